@@ -7,11 +7,20 @@ import re
 import sys
 import time
 import csv
+import json
+import base64
+import hashlib
+import queue
+import sqlite3
+import asyncio
 import threading
 import subprocess
+import unicodedata
+from urllib.parse import urlparse
+from weakref import WeakKeyDictionary
 from dataclasses import dataclass
 from difflib import SequenceMatcher
-from typing import Optional, Tuple, List, Dict
+from typing import Optional, Tuple, List, Dict, Callable
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import tkinter as tk
@@ -24,6 +33,7 @@ from openpyxl.utils import get_column_letter
 from openpyxl.styles import Font, Alignment
 
 import requests
+from requests.adapters import HTTPAdapter
 import xml.etree.ElementTree as ET
 
 from selenium import webdriver
@@ -31,7 +41,7 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import JavascriptException, TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
 
 import kl_protest_module as klm
@@ -42,6 +52,18 @@ try:
 except Exception:
     HAS_DND = False
 
+try:
+    import aiohttp  # type: ignore
+    HAS_AIOHTTP = True
+except Exception:
+    HAS_AIOHTTP = False
+
+try:
+    import psutil  # type: ignore
+    HAS_PSUTIL = True
+except Exception:
+    HAS_PSUTIL = False
+
 
 APP_BUILD = "2026-03-03_clipboard_C_turbo_parallel_cache"
 
@@ -57,10 +79,16 @@ STRICT_FORMS_RE = re.compile(
 
 KL_PROTEST_DEFAULT_URL = "https://www.kauppalehti.fi/yritykset/protestilista"
 YTJ_COMPANY_URL = "https://tietopalvelu.ytj.fi/yritys/{}"
+YTJ_HOME_URL = "https://tietopalvelu.ytj.fi/"
 
 # --- YTJ SOAP company search (name -> Y-tunnus) ---
 # Public documentation shows HTTP GET for wmYritysHaku on api.tietopalvelu.ytj.fi :contentReference[oaicite:1]{index=1}
 YTJ_SOAP_HTTPGET = "https://api.tietopalvelu.ytj.fi/yritystiedot.asmx/wmYritysHaku"
+# Same service, company details (contact info) for one Y-tunnus
+YTJ_SOAP_DETAILS_HTTPGET = "https://api.tietopalvelu.ytj.fi/yritystiedot.asmx/wmYritysTiedot"
+# wmYritysTiedot answers only signed requests: customer id + key from YTJ
+YTJ_CUSTOMER_ENV = "YTJ_ASIAKASTUNNUS"
+YTJ_KEY_ENV = "YTJ_AVAIN"
 
 
 # =========================
@@ -74,19 +102,31 @@ class SpeedProfile:
     kl_post_click_sleep: float
     kl_max_passes: int
     # YTJ email Selenium pacing
-    ytj_retry_reads: int
-    ytj_retry_sleep: float
+    ytj_settle_quiet: float    # DOM quiet time before "no contact section" is concluded
+    ytj_reveal_timeout: float  # max wait for content revealed by "Näytä"
     ytj_nayta_passes: int
     ytj_per_company_sleep: float
     # timeouts
     page_load_timeout: int
     ytj_page_load_timeout: int
     # C upgrades
-    name_workers: int          # SOAP parallel workers
-    email_workers: int         # Selenium parallel workers (each worker has its own driver)
+    name_workers: int          # SOAP requests in flight at start (AIMD adapts from here)
+    name_workers_max: int      # ... and never above this
+    name_async: bool           # resolve names on an asyncio loop (needs aiohttp), same AIMD limits
+    email_workers: int         # Selenium workers at start (each worker has its own driver)
+    email_workers_max: int     # ... and never above this
+    tabs_per_worker: int       # YTJ pages in flight per driver (1 = classic one page at a time)
+    lean_workers: bool         # headless, eager-load, resource-blocking YTJ worker Chrome
+    ytj_extract_mode: str      # "dom" = scrape the page, "cdp" = read backend JSON first (DOM fallback)
+    http_workers: int          # plain-HTTP YT -> email lookups before Selenium (0 = off)
+    http_cookie_handoff: bool  # hybrid: one browser accepts consent, HTTP client reuses its cookies
+    fetch_fanout: int          # in-browser fetch() calls in flight from one YTJ tab (0 = off)
+    driver_recycle_pages: int  # replace a worker Chrome after N company pages (0 = never)
+    driver_recycle_mem_mb: int   # ... or when its Chrome processes use more RAM than this (0 = never)
     soap_timeout: float        # requests timeout for SOAP
     soap_max_results: int      # read at most N results per name
     turbo_relaxed_match: bool  # allow softer name matching in Turbo
+    host_rates: Dict[str, float]  # requests/second per host, shared by every outbound path
 
 
 SPEEDS: Dict[str, SpeedProfile] = {
@@ -95,68 +135,132 @@ SPEEDS: Dict[str, SpeedProfile] = {
         kl_scroll_sleep=0.35,
         kl_post_click_sleep=0.55,
         kl_max_passes=700,
-        ytj_retry_reads=8,
-        ytj_retry_sleep=0.20,
+        ytj_settle_quiet=0.80,
+        ytj_reveal_timeout=2.0,
         ytj_nayta_passes=4,
         ytj_per_company_sleep=0.08,
         page_load_timeout=25,
         ytj_page_load_timeout=25,
         name_workers=6,
+        name_workers_max=10,
+        name_async=False,
         email_workers=1,
+        email_workers_max=1,
+        tabs_per_worker=1,
+        lean_workers=False,
+        ytj_extract_mode="dom",
+        http_workers=4,
+        http_cookie_handoff=False,
+        fetch_fanout=0,
+        driver_recycle_pages=300,
+        driver_recycle_mem_mb=1000,
         soap_timeout=12.0,
         soap_max_results=25,
         turbo_relaxed_match=False,
+        host_rates={
+            "api.tietopalvelu.ytj.fi": 5.0,
+            "tietopalvelu.ytj.fi": 2.0,
+            "www.kauppalehti.fi": 3.0,
+        },
     ),
     "Normal": SpeedProfile(
         name="Normal",
         kl_scroll_sleep=0.25,
         kl_post_click_sleep=0.35,
         kl_max_passes=500,
-        ytj_retry_reads=6,
-        ytj_retry_sleep=0.15,
+        ytj_settle_quiet=0.60,
+        ytj_reveal_timeout=1.5,
         ytj_nayta_passes=3,
         ytj_per_company_sleep=0.05,
         page_load_timeout=18,
         ytj_page_load_timeout=18,
         name_workers=10,
+        name_workers_max=20,
+        name_async=False,
         email_workers=2,
+        email_workers_max=3,
+        tabs_per_worker=2,
+        lean_workers=True,
+        ytj_extract_mode="dom",
+        http_workers=8,
+        http_cookie_handoff=True,
+        fetch_fanout=8,
+        driver_recycle_pages=250,
+        driver_recycle_mem_mb=1200,
         soap_timeout=10.0,
         soap_max_results=30,
         turbo_relaxed_match=False,
+        host_rates={
+            "api.tietopalvelu.ytj.fi": 10.0,
+            "tietopalvelu.ytj.fi": 4.0,
+            "www.kauppalehti.fi": 4.0,
+        },
     ),
     "Fast": SpeedProfile(
         name="Fast",
         kl_scroll_sleep=0.18,
         kl_post_click_sleep=0.22,
         kl_max_passes=450,
-        ytj_retry_reads=5,
-        ytj_retry_sleep=0.12,
+        ytj_settle_quiet=0.45,
+        ytj_reveal_timeout=1.2,
         ytj_nayta_passes=2,
         ytj_per_company_sleep=0.02,
         page_load_timeout=14,
         ytj_page_load_timeout=14,
         name_workers=16,
+        name_workers_max=32,
+        name_async=False,
         email_workers=3,
+        email_workers_max=4,
+        tabs_per_worker=3,
+        lean_workers=True,
+        ytj_extract_mode="dom",
+        http_workers=16,
+        http_cookie_handoff=True,
+        fetch_fanout=16,
+        driver_recycle_pages=200,
+        driver_recycle_mem_mb=1400,
         soap_timeout=8.0,
         soap_max_results=40,
         turbo_relaxed_match=False,
+        host_rates={
+            "api.tietopalvelu.ytj.fi": 16.0,
+            "tietopalvelu.ytj.fi": 6.0,
+            "www.kauppalehti.fi": 5.0,
+        },
     ),
     "Turbo": SpeedProfile(
         name="Turbo",
         kl_scroll_sleep=0.14,
         kl_post_click_sleep=0.18,
         kl_max_passes=420,
-        ytj_retry_reads=4,
-        ytj_retry_sleep=0.10,
+        ytj_settle_quiet=0.35,
+        ytj_reveal_timeout=1.0,
         ytj_nayta_passes=2,
         ytj_per_company_sleep=0.00,
         page_load_timeout=12,
         ytj_page_load_timeout=12,
         name_workers=26,
+        name_workers_max=48,
+        name_async=True,
         email_workers=4,
+        email_workers_max=6,
+        tabs_per_worker=4,
+        lean_workers=True,
+        ytj_extract_mode="cdp",
+        http_workers=32,
+        http_cookie_handoff=True,
+        fetch_fanout=32,
+        driver_recycle_pages=150,
+        driver_recycle_mem_mb=1600,
         soap_timeout=6.0,
         soap_max_results=60,
         turbo_relaxed_match=True,
+        host_rates={
+            "api.tietopalvelu.ytj.fi": 25.0,
+            "tietopalvelu.ytj.fi": 10.0,
+            "www.kauppalehti.fi": 6.0,
+        },
     ),
 }
 
@@ -250,6 +354,127 @@ class Row:
     notes: str = ""
 
 
+@dataclass
+class EmailResult:
+    """One finished YT -> email lookup, emitted as soon as the company is done."""
+    yt: str
+    email: str = ""
+    latency: float = 0.0       # seconds spent on this company
+    attempts: int = 0          # page reads needed (0 = answered from cache)
+    page_bytes: int = 0        # bytes transferred for the company page (lean workers)
+    source: str = ""
+    notes: str = ""
+
+
+class ResultStream:
+    """
+    Per-company event stream of the email engine.
+    Subscribers are called from worker threads in completion order;
+    a failing subscriber never breaks the run.
+    """
+
+    def __init__(self):
+        self._subs: List[Callable[[EmailResult], None]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, fn: Callable[[EmailResult], None]):
+        with self._lock:
+            self._subs.append(fn)
+
+    def emit(self, res: EmailResult):
+        with self._lock:
+            subs = list(self._subs)
+        for fn in subs:
+            try:
+                fn(res)
+            except Exception:
+                pass
+
+
+class RowCollector:
+    """Stream subscriber that turns EmailResults into output Rows."""
+
+    def __init__(self):
+        self.rows: List[Row] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, res: EmailResult):
+        with self._lock:
+            self.rows.append(Row(name="", yt=res.yt, email=res.email, source=res.source, notes=res.notes))
+
+    def sorted_rows(self) -> List[Row]:
+        with self._lock:
+            return sorted(self.rows, key=lambda r: r.yt)
+
+
+class YtFeed:
+    """
+    Y-tunnukset arriving over time (input of the email engine and between
+    its stages). Thread-safe; duplicates are dropped on put(). The producer
+    calls close() once no more will come.
+    """
+
+    def __init__(self, yts: Optional[List[str]] = None):
+        self._cond = threading.Condition()
+        self._items: List[str] = []
+        self._seen = set()
+        self._closed = False
+        if yts:
+            self.put(yts)
+
+    def put(self, yts: List[str]) -> int:
+        """Adds the unseen YTs; returns how many were new."""
+        with self._cond:
+            new = [yt for yt in yts if yt and yt not in self._seen]
+            self._seen.update(new)
+            self._items.extend(new)
+            if new:
+                self._cond.notify_all()
+            return len(new)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def total(self) -> int:
+        """YTs put so far."""
+        with self._cond:
+            return len(self._seen)
+
+    def all(self) -> List[str]:
+        """Every YT put so far, taken or not."""
+        with self._cond:
+            return sorted(self._seen)
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._items)
+
+    def drained(self) -> bool:
+        """Closed and nothing left to take."""
+        with self._cond:
+            return self._closed and not self._items
+
+    def take(self, max_n: int, wait: float = 0.0) -> Optional[List[str]]:
+        """
+        Up to max_n YTs. Waits at most `wait` seconds for max_n to gather
+        (returns early once closed); [] if none came, None once drained.
+        """
+        end = time.monotonic() + wait
+        with self._cond:
+            while len(self._items) < max_n and not self._closed:
+                left = end - time.monotonic()
+                if left <= 0:
+                    break
+                self._cond.wait(left)
+            if not self._items:
+                return None if self._closed else []
+            out, self._items = self._items[:max_n], self._items[max_n:]
+            return out
+
+
 # =========================
 #   UTIL
 # =========================
@@ -331,6 +556,29 @@ def extract_names_from_text(text: str, strict: bool, max_names: int) -> List[str
     return out
 
 
+# Written-out legal forms and their abbreviations. The form is part of the
+# lookup key: "Virtanen Oy" and "Virtanen Ky" are different companies.
+LEGAL_FORM_ALIASES = {
+    "osakeyhtiö": "oy",
+    "kommandiittiyhtiö": "ky",
+    "avoin yhtiö": "ay",
+    "toiminimi": "tmi",
+    "aktiebolag": "ab",
+}
+LEGAL_FORM_RE = re.compile(r"\b(" + "|".join(LEGAL_FORM_ALIASES) + r")\b")
+NAME_PUNCT_RE = re.compile(r"[^\w\s]+")
+
+
+def canonical_name_key(name: str) -> str:
+    """
+    Lookup key for a company name: NFKC, casefold, punctuation stripped,
+    written-out legal forms abbreviated, whitespace collapsed.
+    """
+    base = unicodedata.normalize("NFKC", name or "").casefold()
+    base = " ".join(NAME_PUNCT_RE.sub(" ", base).split())
+    return LEGAL_FORM_RE.sub(lambda m: LEGAL_FORM_ALIASES[m.group(1)], base)
+
+
 def best_name_match_score(query: str, candidate: str) -> float:
     q = (query or "").lower().strip()
     c = (candidate or "").lower().strip()
@@ -448,17 +696,156 @@ def extract_ytunnukset_from_pdf(pdf_path: str) -> List[str]:
 # =========================
 #   SELENIUM COMMON
 # =========================
+# Lean YTJ workers never need these: images, fonts, media, third-party trackers.
+LEAN_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.avif",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3", "*.ogg",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*hotjar.com*", "*siteimproveanalytics*", "*matomo*",
+]
+
+
 def start_new_driver(speed: SpeedProfile):
+    """YTJ worker driver. The KL session uses start_driver_attach_debug instead."""
     options = webdriver.ChromeOptions()
-    options.add_argument("--start-maximized")
     options.add_argument("--disable-gpu")
     options.add_argument("--disable-dev-shm-usage")
+    if speed.lean_workers:
+        options.add_argument("--headless=new")
+        options.add_argument("--window-size=1366,900")
+        options.page_load_strategy = "eager"
+    else:
+        options.add_argument("--start-maximized")
+    if speed.ytj_extract_mode == "cdp":
+        # Network events land in the performance log (see CdpJsonCapture)
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
     driver_path = ChromeDriverManager().install()
     drv = webdriver.Chrome(service=Service(driver_path), options=options)
-    drv.set_page_load_timeout(speed.page_load_timeout)
+    drv.ytj_flavor = worker_flavor(speed)
+    drv.ytj_json = CdpJsonCapture(drv) if speed.ytj_extract_mode == "cdp" else None
+    apply_worker_timeouts(drv, speed)
+    if speed.lean_workers:
+        apply_lean_blocking(drv)
+    CONSENT.seed_driver(drv)
     return drv
 
 
+def worker_flavor(speed: SpeedProfile) -> Tuple[bool, str]:
+    """Launch-time options of a worker driver; a pooled driver is reused only for the same flavour."""
+    return speed.lean_workers, speed.ytj_extract_mode
+
+
+def apply_lean_blocking(drv):
+    """CDP URL blocking applies per tab, so call this for every new worker tab."""
+    try:
+        drv.execute_cdp_cmd("Network.enable", {})
+        drv.execute_cdp_cmd("Network.setBlockedURLs", {"urls": LEAN_BLOCKED_URLS})
+    except Exception:
+        pass
+
+
+def apply_worker_timeouts(drv, speed: SpeedProfile):
+    drv.set_page_load_timeout(speed.page_load_timeout)
+    # async readiness scripts may run for a full page-load timeout
+    drv.set_script_timeout(speed.ytj_page_load_timeout + 5)
+
+
+def quit_driver(drv):
+    try:
+        drv.quit()
+    except Exception:
+        pass
+
+
+def driver_healthy(drv) -> bool:
+    try:
+        return drv.execute_script("return 1;") == 1
+    except Exception:
+        return False
+
+
+class DriverPool:
+    """
+    Long-lived pool of warm YTJ worker drivers, shared across runs.
+    Keeps up to `email_workers` idle drivers between runs (the rest are quit),
+    health-checks drivers on checkout and resizes when the speed changes.
+    """
+
+    def __init__(self, factory: Callable[[SpeedProfile], object] = start_new_driver):
+        self._factory = factory
+        self._idle: List[object] = []
+        self._lock = threading.Lock()
+        self._size = 1
+        self._speed: Optional[SpeedProfile] = None
+        self._used = False
+        self._closed = False
+
+    def configure(self, speed: SpeedProfile):
+        """
+        Adopt a speed profile: shrink idle extras now and, once the pool has
+        been used, grow back to `email_workers` in the background.
+        """
+        with self._lock:
+            self._speed = speed
+            self._size = max(1, speed.email_workers)
+            extra = self._idle[self._size:]
+            del self._idle[self._size:]
+            missing = (self._size - len(self._idle)) if self._used else 0
+        for drv in extra:
+            quit_driver(drv)
+        if missing > 0:
+            threading.Thread(target=self._grow, args=(missing,), daemon=True).start()
+
+    def _grow(self, n: int):
+        for _ in range(n):
+            with self._lock:
+                if self._closed or len(self._idle) >= self._size or self._speed is None:
+                    return
+                speed = self._speed
+            try:
+                drv = self._factory(speed)
+            except Exception:
+                return
+            self.checkin(drv)
+
+    def checkout(self, speed: SpeedProfile):
+        """Warm healthy driver if one is idle, otherwise a freshly started one."""
+        with self._lock:
+            self._used = True
+        while True:
+            with self._lock:
+                drv = self._idle.pop() if self._idle else None
+            if drv is None:
+                return self._factory(speed)
+            # launch options (lean / cdp logging) cannot change on a live driver
+            if getattr(drv, "ytj_flavor", None) == worker_flavor(speed) and driver_healthy(drv):
+                try:
+                    apply_worker_timeouts(drv, speed)
+                except Exception:
+                    pass
+                return drv
+            quit_driver(drv)
+
+    def checkin(self, drv, broken: bool = False):
+        if drv is None:
+            return
+        if not broken:
+            with self._lock:
+                if not self._closed and len(self._idle) < self._size:
+                    self._idle.append(drv)
+                    return
+        quit_driver(drv)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for drv in idle:
+            quit_driver(drv)
+
+
 def start_driver_attach_debug(port: int, speed: SpeedProfile):
     options = webdriver.ChromeOptions()
     options.add_experimental_option("debuggerAddress", f"127.0.0.1:{port}")
@@ -468,136 +855,1791 @@ def start_driver_attach_debug(port: int, speed: SpeedProfile):
     return drv
 
 
-def safe_click(driver, elem) -> bool:
-    try:
-        driver.execute_script("arguments[0].scrollIntoView({block:'center'});", elem)
-        time.sleep(0.02)
-        try:
-            elem.click()
-        except Exception:
-            driver.execute_script("arguments[0].click();", elem)
-        return True
-    except Exception:
-        return False
+def safe_click(driver, elem) -> bool:
+    try:
+        driver.execute_script("arguments[0].scrollIntoView({block:'center'});", elem)
+        time.sleep(0.02)
+        try:
+            elem.click()
+        except Exception:
+            driver.execute_script("arguments[0].click();", elem)
+        return True
+    except Exception:
+        return False
+
+
+def wait_loaded(driver, timeout=18):
+    WebDriverWait(driver, timeout).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+
+
+def _sweep_cookie_banner(driver) -> bool:
+    texts = ["Hyväksy", "Hyväksy kaikki", "Salli kaikki", "Accept", "Accept all", "I agree", "OK", "Selvä"]
+    clicked = False
+    for _ in range(2):
+        for e in driver.find_elements(By.XPATH, "//button|//a|//*[@role='button']"):
+            try:
+                t = (e.text or "").strip()
+                if not t:
+                    continue
+                if any(x.lower() in t.lower() for x in texts):
+                    if e.is_displayed() and e.is_enabled():
+                        if safe_click(driver, e):
+                            clicked = True
+                        time.sleep(0.20)
+                        break
+            except Exception:
+                continue
+    return clicked
+
+
+def url_origin(url: str) -> str:
+    u = urlparse(url or "")
+    return f"{u.scheme}://{u.netloc}" if u.netloc else ""
+
+
+def _cdp_cookie(c: Dict) -> Dict:
+    """Selenium cookie dict -> CDP Network.CookieParam."""
+    out = {"name": c["name"], "value": c["value"], "domain": c.get("domain", ""), "path": c.get("path") or "/"}
+    if c.get("secure"):
+        out["secure"] = True
+    if c.get("httpOnly"):
+        out["httpOnly"] = True
+    if c.get("sameSite") in ("Strict", "Lax", "None"):
+        out["sameSite"] = c["sameSite"]
+    if c.get("expiry"):
+        out["expires"] = c["expiry"]
+    return out
+
+
+class ConsentState:
+    """
+    Cookie-banner bookkeeping per driver and origin. Once consent is accepted
+    on an origin (or two sweeps in a row find no banner) the sweep is skipped
+    for that driver for a while (ACCEPTED_SKIP_SECS / MISSED_SKIP_SECS), so a
+    banner that renders late or comes back is still found; cookies saved at
+    acceptance are pre-seeded into new worker drivers over CDP, so they never
+    see the banner at all.
+    """
+
+    MISSES_BEFORE_SKIP = 2
+    ACCEPTED_SKIP_SECS = 600.0
+    MISSED_SKIP_SECS = 60.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # driver -> {origin: (sweeps without a banner, skip until monotonic time)}
+        self._handled: "WeakKeyDictionary[object, Dict[str, Tuple[int, float]]]" = WeakKeyDictionary()
+        self._cookies: Dict[str, List[Dict]] = {}
+
+    def handled(self, driver, origin: str) -> bool:
+        with self._lock:
+            _, until = self._handled.get(driver, {}).get(origin, (0, 0.0))
+            return time.monotonic() < until
+
+    def record(self, driver, origin: str, accepted: bool):
+        with self._lock:
+            seen = self._handled.setdefault(driver, {})
+            now = time.monotonic()
+            if accepted:
+                seen[origin] = (0, now + self.ACCEPTED_SKIP_SECS)
+                return
+            misses = seen.get(origin, (0, 0.0))[0] + 1
+            if misses >= self.MISSES_BEFORE_SKIP:
+                seen[origin] = (0, now + self.MISSED_SKIP_SECS)
+            else:
+                seen[origin] = (misses, 0.0)
+
+    def save_cookies(self, origin: str, cookies: List[Dict]):
+        with self._lock:
+            self._cookies[origin] = list(cookies)
+
+    def seed_driver(self, driver):
+        with self._lock:
+            saved = dict(self._cookies)
+        for origin, cookies in saved.items():
+            try:
+                driver.execute_cdp_cmd("Network.setCookies", {"cookies": [_cdp_cookie(c) for c in cookies]})
+            except Exception:
+                continue
+            self.record(driver, origin, True)
+
+
+CONSENT = ConsentState()
+
+
+def try_accept_cookies(driver, url: str = "", force: bool = False):
+    """
+    Accepts a cookie banner, sweeping at most once in a while per driver and
+    origin (force=True always sweeps). Pass the URL just navigated to; without
+    it the driver is asked for its current URL.
+    """
+    if not url:
+        try:
+            url = driver.current_url or ""
+        except Exception:
+            url = ""
+    origin = url_origin(url)
+    if not force and CONSENT.handled(driver, origin):
+        return
+    accepted = _sweep_cookie_banner(driver)
+    CONSENT.record(driver, origin, accepted)
+    if accepted:
+        try:
+            CONSENT.save_cookies(origin, driver.get_cookies())
+        except Exception:
+            pass
+
+
+# =========================
+#   ADAPTIVE CONCURRENCY (AIMD)
+# =========================
+class AimdController:
+    """
+    Additive-increase / multiplicative-decrease limit on in-flight requests.
+    Starts at `start` and never exceeds `cap`: every fast success adds
+    1/limit (about +1 per round of requests), an error, timeout or a response
+    slower than `slow_after` seconds halves it (at most once per `cooldown`).
+    """
+
+    def __init__(self, start: int, cap: int, slow_after: float, floor: int = 1, cooldown: float = 2.0):
+        self.cap = max(floor, cap)
+        self.floor = floor
+        self.limit = float(min(self.cap, max(floor, start)))
+        self.slow_after = slow_after
+        self.cooldown = cooldown
+        self.successes = 0
+        self.failures = 0
+        self.cuts = 0
+        self._inflight = 0
+        self._last_cut = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self, stop_flag: threading.Event, idle: Optional[Callable[[], bool]] = None) -> bool:
+        """Blocks for a slot; False when stopped or when `idle()` says there is nothing to do."""
+        with self._cond:
+            while self._inflight >= int(self.limit):
+                if stop_flag.is_set() or (idle is not None and idle()):
+                    return False
+                self._cond.wait(0.1)
+            self._inflight += 1
+            return True
+
+    def try_acquire(self) -> bool:
+        with self._cond:
+            if self._inflight >= int(self.limit):
+                return False
+            self._inflight += 1
+            return True
+
+    def release(self, ok: bool, latency: float):
+        with self._cond:
+            self._inflight = max(0, self._inflight - 1)
+            now = time.monotonic()
+            if ok and latency <= self.slow_after:
+                self.successes += 1
+                self.limit = min(self.cap, self.limit + 1.0 / max(1.0, self.limit))
+            else:
+                self.failures += 1
+                if now - self._last_cut >= self.cooldown:
+                    self.limit = max(self.floor, self.limit * 0.5)
+                    self._last_cut = now
+                    self.cuts += 1
+            self._cond.notify_all()
+
+    def abandon(self):
+        """Give a slot back without feedback (nothing was requested)."""
+        with self._cond:
+            self._inflight = max(0, self._inflight - 1)
+            self._cond.notify_all()
+
+    def summary(self) -> str:
+        return f"raja {int(self.limit)}/{self.cap}, ok {self.successes}, virheitä {self.failures}, pudotuksia {self.cuts}"
+
+
+# =========================
+#   PER-HOST RATE LIMIT
+# =========================
+def host_of(url: str) -> str:
+    return (urlparse(url).hostname or url or "").lower()
+
+
+class HostRateLimiter:
+    """
+    Process-wide token buckets keyed by host. Every outbound path (SOAP, the
+    HTTP client, browser navigations, in-page fetch fan-out, KL clicks)
+    acquires before it sends; hosts without a configured rate pass freely.
+    Tokens are reserved up front, so waiters are served in arrival order.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rates: Dict[str, float] = {}
+        self._buckets: Dict[str, List[float]] = {}   # host -> [tokens, last refill]
+        self._stats: Dict[str, List[float]] = {}     # host -> [requests, total wait, max wait]
+
+    def configure(self, rates: Dict[str, float]):
+        """New rates for a run; wait-time metrics start over."""
+        with self._lock:
+            self._rates = {h.lower(): r for h, r in rates.items() if r > 0}
+            self._buckets = {}
+            self._stats = {}
+
+    def interval(self, url: str) -> float:
+        """Seconds between requests to the host of `url` (0 = unlimited)."""
+        with self._lock:
+            rate = self._rates.get(host_of(url))
+        return 1.0 / rate if rate else 0.0
+
+    def reserve(self, url: str, n: int = 1) -> float:
+        """Takes n tokens; returns how long to wait before the first request may go."""
+        host = host_of(url)
+        now = time.monotonic()
+        with self._lock:
+            rate = self._rates.get(host)
+            wait = 0.0
+            if rate:
+                burst = max(1.0, rate)
+                b = self._buckets.setdefault(host, [burst, now])
+                b[0] = min(burst, b[0] + (now - b[1]) * rate)
+                b[1] = now
+                wait = max(0.0, (1.0 - b[0]) / rate)
+                b[0] -= n
+            st = self._stats.setdefault(host, [0, 0.0, 0.0])
+            st[0] += n
+            st[1] += wait
+            st[2] = max(st[2], wait)
+        return wait
+
+    def acquire(self, url: str, n: int = 1, stop_flag: Optional[threading.Event] = None):
+        """
+        Blocks until the first of n requests may go; with n > 1 the caller
+        spaces the rest by interval(url).
+        """
+        wait = self.reserve(url, n)
+        end = time.monotonic() + wait
+        while wait > 0:
+            if stop_flag is not None and stop_flag.is_set():
+                return
+            time.sleep(min(wait, 0.1))
+            wait = end - time.monotonic()
+
+    def stats_text(self) -> str:
+        with self._lock:
+            items = sorted(self._stats.items())
+        return "; ".join(
+            f"{h}: {int(n)} pyyntöä, odotus {tot:.1f}s (max {mx:.2f}s)" for h, (n, tot, mx) in items
+        )
+
+
+RATE_LIMITER = HostRateLimiter()
+
+
+# =========================
+#   YTJ CIRCUIT BREAKER
+# =========================
+# Text of bot challenges / rate-limit pages (lower case). Only consulted when
+# the company's own Y-tunnus is not on the page. Plain outages ("service
+# unavailable", 503) and "access denied" are not throttling and do not count.
+YTJ_BLOCK_MARKERS = (
+    "captcha",
+    "too many requests",
+    "unusual traffic",
+    "are you a robot",
+    "liian monta pyyntöä",
+)
+BREAKER_BASE_BACKOFF = 20.0     # seconds everyone waits after the first block page
+BREAKER_MAX_BACKOFF = 300.0
+BREAKER_MAX_FAILED_PROBES = 6   # blocked probes in a row before the run gives up on that host
+
+
+class YtjBlocked(Exception):
+    """YTJ answered with a throttling or bot-challenge page; `host` is who did."""
+
+    def __init__(self, msg: str, host: str = ""):
+        super().__init__(msg)
+        self.host = host
+
+
+def looks_blocked(status: int, text: str, yt: str) -> bool:
+    if status == 429:
+        return True
+    text = text or ""
+    if yt and yt in text:
+        return False
+    head = text[:6000].lower()
+    return any(m in head for m in YTJ_BLOCK_MARKERS)
+
+
+class CircuitBreaker:
+    """
+    Shared by every YTJ email path that talks to `host`. A block page trips it
+    open: everyone waits out the back-off, then a single caller is let through
+    as the probe. A clean probe closes it; a blocked one reopens it with twice
+    the back-off, and after BREAKER_MAX_FAILED_PROBES in a row the breaker
+    gives up on its host for the run.
+    """
+
+    def __init__(self, host: str = ""):
+        self.host = host
+        self._cond = threading.Condition()
+        self.reset()
+
+    def reset(self, on_change: Optional[Callable[[str], None]] = None):
+        """Closed again for a new run; on_change gets Finnish status messages."""
+        with self._cond:
+            self._open = False
+            self._open_until = 0.0
+            self._probing = False
+            self._backoff = 0.0
+            self._failed_probes = 0
+            self._on_change = on_change
+            self.trips = 0
+            self.gave_up = False
+            self._cond.notify_all()
+
+    def try_admit(self) -> Optional[bool]:
+        """Non-blocking: False = go ahead, True = go ahead as the probe, None = wait."""
+        with self._cond:
+            if self.gave_up:
+                return None
+            if not self._open:
+                return False
+            if not self._probing and time.monotonic() >= self._open_until:
+                self._probing = True
+                return True
+            return None
+
+    def closed(self) -> bool:
+        """Requests would go straight through (does not take the probe)."""
+        with self._cond:
+            return not self._open and not self.gave_up
+
+    def admit(self, stop_flag: threading.Event) -> Optional[bool]:
+        """Blocking try_admit(); None once stop_flag is set or the breaker gave up."""
+        while not stop_flag.is_set():
+            probe = self.try_admit()
+            if probe is not None:
+                return probe
+            if self.gave_up:
+                return None
+            with self._cond:
+                self._cond.wait(timeout=0.25)
+        return None
+
+    def record(self, blocked: bool, probe: bool = False):
+        """Outcome of one request; non-probe results while open change nothing."""
+        msg = ""
+        with self._cond:
+            if blocked and (probe or not self._open):
+                if probe:
+                    self._failed_probes += 1
+                    self._backoff = min(BREAKER_MAX_BACKOFF, self._backoff * 2)
+                else:
+                    self.trips += 1
+                    self._backoff = BREAKER_BASE_BACKOFF
+                self._open = True
+                self._open_until = time.monotonic() + self._backoff
+                if self._failed_probes >= BREAKER_MAX_FAILED_PROBES:
+                    self.gave_up = True
+                    msg = f"{self.host} estää edelleen pyynnöt – lopetetaan sen haut tältä ajolta."
+                else:
+                    msg = f"{self.host} estää pyyntöjä – kaikki odottavat {self._backoff:.0f}s ja kokeilevat yhdellä…"
+            elif probe:
+                self._open = False
+                self._backoff = 0.0
+                self._failed_probes = 0
+                msg = f"{self.host} vastaa taas – jatketaan."
+            if probe:
+                self._probing = False
+            self._cond.notify_all()
+        if msg and self._on_change is not None:
+            try:
+                self._on_change(msg)
+            except Exception:
+                pass
+
+    def abandon_probe(self):
+        """The probe never produced an answer (stop, crash); someone else may try."""
+        with self._cond:
+            self._probing = False
+            self._cond.notify_all()
+
+
+class HostBreakers:
+    """One CircuitBreaker per host, created on first use and kept across runs."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_host: Dict[str, CircuitBreaker] = {}
+        self._on_change: Optional[Callable[[str], None]] = None
+
+    def for_url(self, url: str) -> CircuitBreaker:
+        host = host_of(url)
+        with self._lock:
+            brk = self._by_host.get(host)
+            if brk is None:
+                brk = self._by_host[host] = CircuitBreaker(host)
+                brk.reset(on_change=self._on_change)
+            return brk
+
+    def reset(self, on_change: Optional[Callable[[str], None]] = None):
+        with self._lock:
+            self._on_change = on_change
+            breakers = list(self._by_host.values())
+        for brk in breakers:
+            brk.reset(on_change=on_change)
+
+    @property
+    def trips(self) -> int:
+        with self._lock:
+            return sum(b.trips for b in self._by_host.values())
+
+
+YTJ_BREAKERS = HostBreakers()
+# company pages (browser workers, page fallback) share one host
+YTJ_PAGE_BREAKER = YTJ_BREAKERS.for_url(YTJ_COMPANY_URL)
+
+
+# =========================
+#   YTJ EMAIL (Selenium)
+# =========================
+# One round trip per read: mailto hrefs, "Sähköposti" row texts, the number
+# of visible "Näytä" controls, bytes transferred for
+# the page (Resource Timing; cross-origin entries without TAO count as 0) and
+# (only when there is no mailto) the body text fallback.
+YTJ_EXTRACT_JS = r"""
+var out = {mailto: [], rows: [], nayta: 0, body: ""};
+var links = document.getElementsByTagName("a");
+for (var i = 0; i < links.length; i++) {
+  var href = links[i].getAttribute("href") || "";
+  if (/^mailto:/i.test(href)) { out.mailto.push(href); }
+}
+var trs = document.getElementsByTagName("tr");
+for (var j = 0; j < trs.length; j++) {
+  var cells = trs[j].querySelectorAll("td,th");
+  for (var k = 0; k < cells.length; k++) {
+    var t = cells[k].textContent || "";
+    if (t.indexOf("Sähköposti") >= 0) { out.rows.push(trs[j].innerText || ""); break; }
+  }
+}
+var btns = document.querySelectorAll("button, a");
+for (var m = 0; m < btns.length; m++) {
+  var b = btns[m];
+  if ((b.innerText || b.textContent || "").trim().toLowerCase() !== "näytä" || b.disabled) { continue; }
+  if (b.offsetWidth || b.offsetHeight || b.getClientRects().length) { out.nayta++; }
+}
+if (!out.mailto.length && document.body) { out.body = document.body.innerText || ""; }
+var perf = (window.performance && performance.getEntriesByType) ? performance : null;
+out.bytes = 0;
+if (perf) {
+  var entries = perf.getEntriesByType("navigation").concat(perf.getEntriesByType("resource"));
+  for (var q = 0; q < entries.length; q++) { out.bytes += entries[q].transferSize || 0; }
+}
+return out;
+"""
+
+YTJ_TIMEOUT_NOTE = "page timeout"
+YTJ_BLOCKED_NOTE = "blocked by YTJ"
+
+# page classes for early termination
+YTJ_HAS_EMAIL = "email"
+YTJ_HIDDEN_EMAIL = "hidden"
+YTJ_NO_CONTACT = "none"
+
+
+# A page script that fails or times out leaves the driver usable; any other
+# WebDriverException (dead session, closed window) propagates so the caller
+# requeues the YT instead of writing it out as a miss.
+PAGE_SCRIPT_ERRORS = (JavascriptException, TimeoutException)
+
+
+def read_ytj_page(driver) -> Dict:
+    try:
+        return driver.execute_script(YTJ_EXTRACT_JS) or {}
+    except PAGE_SCRIPT_ERRORS:
+        return {}
+
+
+def email_from_ytj_snapshot(snap: Dict) -> str:
+    for href in snap.get("mailto") or []:
+        email = href.split(":", 1)[1].strip()
+        if email:
+            return email
+    for row in snap.get("rows") or []:
+        email = pick_email_from_text(row or "")
+        if email:
+            return email
+    return pick_email_from_text(snap.get("body") or "")
+
+
+def classify_ytj_page(snap: Dict, wait_state: str) -> str:
+    """
+    has-email / hidden-email (needs "Näytä") / no-contact-info for a loaded page.
+    Only a page that rendered and settled without a contact section is "none".
+    """
+    if email_from_ytj_snapshot(snap):
+        return YTJ_HAS_EMAIL
+    if snap.get("rows") or snap.get("nayta") or "Sähköposti" in (snap.get("body") or ""):
+        return YTJ_HIDDEN_EMAIL
+    if wait_state == "absent":
+        return YTJ_NO_CONTACT
+    # never settled (timeout): keep the full treatment
+    return YTJ_HIDDEN_EMAIL
+
+
+# Finds every visible, enabled "Näytä" control in page context. With
+# arguments[0] true it clicks them and returns how many were expanded,
+# otherwise it returns how many are still pending (0 once a mailto exists).
+YTJ_NAYTA_JS = r"""
+var click = !!arguments[0], n = 0;
+if (!click && document.querySelector("a[href^='mailto:' i]")) { return 0; }
+var els = document.querySelectorAll("button, a");
+for (var i = 0; i < els.length; i++) {
+  var el = els[i];
+  var t = (el.innerText || el.textContent || "").trim().toLowerCase();
+  if (t !== "näytä" || el.disabled) { continue; }
+  if (!(el.offsetWidth || el.offsetHeight || el.getClientRects().length)) { continue; }
+  if (!click) { n++; continue; }
+  try { el.click(); n++; } catch (e) {}
+}
+return n;
+"""
+
+
+def _nayta_revealed(driver) -> bool:
+    """DOM condition: a mailto appeared or no visible "Näytä" control is left."""
+    try:
+        return int(driver.execute_script(YTJ_NAYTA_JS, False) or 0) == 0
+    except Exception:
+        return True
+
+
+def click_all_nayta_ytj(driver, speed: SpeedProfile) -> int:
+    """
+    Expands every visible "Näytä" with one script call per pass and waits for
+    the revealed content on the DOM instead of sleeping. Returns clicks made.
+    """
+    expanded = 0
+    timeout = speed.ytj_reveal_timeout
+    for _ in range(speed.ytj_nayta_passes):
+        try:
+            n = int(driver.execute_script(YTJ_NAYTA_JS, True) or 0)
+        except Exception:
+            break
+        if not n:
+            break
+        expanded += n
+        try:
+            WebDriverWait(driver, timeout, poll_frequency=0.05).until(_nayta_revealed)
+        except Exception:
+            pass
+    return expanded
+
+
+# Page-side looks_blocked(): prepended to the readiness scripts below.
+YTJ_BLOCKED_FN_JS = "var ytjBlockMarkers = " + json.dumps(list(YTJ_BLOCK_MARKERS)) + ";\n" + r"""
+function ytjBlocked() {
+  if (document.querySelector("iframe[src*='captcha'], .g-recaptcha, .h-captcha, #challenge-form")) { return true; }
+  var t = ((document.title || "") + " " + (document.body ? (document.body.innerText || "").slice(0, 6000) : "")).toLowerCase();
+  for (var i = 0; i < ytjBlockMarkers.length; i++) {
+    if (t.indexOf(ytjBlockMarkers[i]) >= 0) { return true; }
+  }
+  return false;
+}
+"""
+
+# Resolves as soon as the contact section is on the page ("contact"), or the
+# company page has rendered (its Y-tunnus is visible) without one and the DOM
+# has stayed quiet for arguments[1] ms ("absent"), or a block page has stayed
+# quiet that long ("blocked"); "timeout" otherwise.
+YTJ_WAIT_CONTACT_JS = YTJ_BLOCKED_FN_JS + r"""
+var yt = arguments[0], quietMs = arguments[1], timeoutMs = arguments[2];
+var done = arguments[arguments.length - 1];
+var finished = false, queued = false, quietTimer = null, hardTimer = null, obs = null;
+function state() {
+  if (!document.body) { return null; }
+  if (document.querySelector("a[href^='mailto:' i]")) { return "contact"; }
+  var txt = document.body.innerText || "";
+  if (txt.indexOf("Sähköposti") >= 0) { return "contact"; }
+  if (txt.indexOf(yt) >= 0) { return "rendered"; }
+  return ytjBlocked() ? "blocked" : null;
+}
+function finish(s) {
+  if (finished) { return; }
+  finished = true;
+  if (obs) { obs.disconnect(); }
+  clearTimeout(quietTimer);
+  clearTimeout(hardTimer);
+  done(s);
+}
+function check() {
+  queued = false;
+  var s = state();
+  if (s === "contact") { finish(s); return; }
+  if (s === "rendered" || s === "blocked") {
+    clearTimeout(quietTimer);
+    quietTimer = setTimeout(function () { finish(s === "blocked" ? "blocked" : "absent"); }, quietMs);
+  }
+}
+hardTimer = setTimeout(function () {
+  var s = state();
+  finish(s === "rendered" ? "absent" : s === "blocked" ? "blocked" : "timeout");
+}, timeoutMs);
+obs = new MutationObserver(function () {
+  if (!queued) { queued = true; setTimeout(check, 25); }
+});
+obs.observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+check();
+"""
+
+
+def wait_ytj_contact(driver, yt: str, speed: SpeedProfile) -> str:
+    """
+    Event-driven readiness wait (MutationObserver) for a YTJ company page.
+    Returns "contact", "absent", "blocked" or "timeout".
+    """
+    try:
+        return driver.execute_async_script(
+            YTJ_WAIT_CONTACT_JS,
+            yt,
+            int(speed.ytj_settle_quiet * 1000),
+            int(speed.ytj_page_load_timeout * 1000),
+        ) or "timeout"
+    except PAGE_SCRIPT_ERRORS:
+        return "timeout"
+
+
+def finish_ytj_company(driver, yt: str, state: str, stop_flag: threading.Event, speed: SpeedProfile) -> EmailResult:
+    """
+    Harvest a YTJ company page that has settled into `state` (see
+    wait_ytj_contact). Latency and source are left for the caller.
+    """
+    if state == "blocked":
+        return EmailResult(yt=yt, attempts=1, notes=YTJ_BLOCKED_NOTE)
+    snap = read_ytj_page(driver)
+    res = EmailResult(yt=yt, attempts=1, page_bytes=int(snap.get("bytes") or 0))
+    if state == "timeout":
+        res.notes = YTJ_TIMEOUT_NOTE
+    kind = classify_ytj_page(snap, state)
+    if kind == YTJ_HAS_EMAIL:
+        res.email = email_from_ytj_snapshot(snap)
+        return res
+    if kind == YTJ_NO_CONTACT:
+        return res
+
+    if click_all_nayta_ytj(driver, speed) and not stop_flag.is_set():
+        res.attempts += 1
+        snap = read_ytj_page(driver)
+        res.email = email_from_ytj_snapshot(snap)
+        res.page_bytes = max(res.page_bytes, int(snap.get("bytes") or 0))
+    return res
+
+
+def fetch_email_by_yt(driver, yt: str, stop_flag: threading.Event, speed: SpeedProfile) -> EmailResult:
+    """
+    One company page per call; attempts on the result counts page reads used.
+    """
+    if stop_flag.is_set():
+        return EmailResult(yt=yt)
+    cap: Optional[CdpJsonCapture] = getattr(driver, "ytj_json", None)
+    if cap is not None:
+        cap.reset(None)
+    RATE_LIMITER.acquire(YTJ_COMPANY_URL, stop_flag=stop_flag)
+    try:
+        driver.get(YTJ_COMPANY_URL.format(yt))
+    except TimeoutException:
+        pass
+
+    if cap is not None:
+        # backend JSON vs. rendered DOM, whichever answers first
+        t0 = time.perf_counter()
+        state: Optional[str] = None
+        while state is None and not stop_flag.is_set():
+            _, email = cap.take_email(None, yt)
+            if email:
+                return EmailResult(yt=yt, email=email, attempts=1, notes="cdp json")
+            state = probe_ytj_tab(driver, yt, t0, speed)
+            if state is None:
+                time.sleep(0.05)
+        if stop_flag.is_set():
+            return EmailResult(yt=yt)
+        try_accept_cookies(driver, YTJ_COMPANY_URL.format(yt))
+        return finish_ytj_company(driver, yt, state, stop_flag, speed)
+
+    try:
+        wait_loaded(driver, timeout=speed.ytj_page_load_timeout)
+    except TimeoutException:
+        pass
+    try_accept_cookies(driver, YTJ_COMPANY_URL.format(yt))
+
+    state = wait_ytj_contact(driver, yt, speed)
+    if stop_flag.is_set():
+        return EmailResult(yt=yt)
+    return finish_ytj_company(driver, yt, state, stop_flag, speed)
+
+
+# Non-blocking readiness probe (multi-tab and CDP modes): the same states as
+# YTJ_WAIT_CONTACT_JS, plus how long (ms) the DOM has been quiet and whether
+# whatever the tab shows (possibly a redirect target) is a block page.
+YTJ_PROBE_JS = YTJ_BLOCKED_FN_JS + r"""
+var yt = arguments[0];
+if (!document.body || location.href.indexOf(yt) < 0) { return {state: null, quiet: 0, blocked: ytjBlocked()}; }
+if (!window.__ytjObs) {
+  window.__ytjLast = Date.now();
+  window.__ytjObs = new MutationObserver(function () { window.__ytjLast = Date.now(); });
+  window.__ytjObs.observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+}
+var st = null;
+if (document.querySelector("a[href^='mailto:' i]")) { st = "contact"; }
+else {
+  var txt = document.body.innerText || "";
+  if (txt.indexOf("Sähköposti") >= 0) { st = "contact"; }
+  else if (txt.indexOf(yt) >= 0) { st = "rendered"; }
+  else if (ytjBlocked()) { st = "blocked"; }
+}
+return {state: st, quiet: Date.now() - window.__ytjLast, blocked: st === "blocked"};
+"""
+
+
+def probe_ytj_tab(driver, yt: str, started: float, speed: SpeedProfile) -> Optional[str]:
+    """Current tab's settle state, or None while it is still loading."""
+    try:
+        probe = driver.execute_script(YTJ_PROBE_JS, yt) or {}
+    except PAGE_SCRIPT_ERRORS:
+        probe = {}
+    st = probe.get("state")
+    if st == "contact":
+        return "contact"
+    if st in ("rendered", "blocked") and (probe.get("quiet") or 0) >= speed.ytj_settle_quiet * 1000:
+        return "absent" if st == "rendered" else "blocked"
+    if time.perf_counter() - started > speed.ytj_page_load_timeout:
+        return "blocked" if probe.get("blocked") else "timeout"
+    return None
+
+
+def open_worker_tabs(driver, tabs: int) -> List[str]:
+    handles = list(driver.window_handles[:1])
+    while len(handles) < tabs:
+        driver.switch_to.new_window("tab")
+        handles.append(driver.current_window_handle)
+        if getattr(driver, "ytj_flavor", (False, ""))[0]:
+            apply_lean_blocking(driver)
+    return handles
+
+
+def close_worker_tabs(driver, handles: List[str]):
+    """Leave the driver with a single tab again before it goes back to the pool."""
+    for h in handles[1:]:
+        try:
+            driver.switch_to.window(h)
+            driver.close()
+        except Exception:
+            pass
+    try:
+        driver.switch_to.window(handles[0])
+    except Exception:
+        pass
+
+
+RECYCLE_MEM_CHECK_EVERY = 20    # pages between Chrome memory checks
+MAX_YT_REQUEUES = 2             # crashes a single YT may cause before it is written as a miss
+MAX_WORKER_RESTARTS = 5         # driver restarts per worker before it gives up
+
+
+def driver_memory_mb(driver) -> float:
+    """RSS of the Chrome processes under the driver's chromedriver (0 when unknown)."""
+    service = getattr(getattr(driver, "service", None), "process", None)
+    pid = getattr(service, "pid", None)
+    if not HAS_PSUTIL or not pid:
+        return 0.0
+    try:
+        children = psutil.Process(pid).children(recursive=True)
+    except psutil.Error:
+        return 0.0
+    total = 0
+    for proc in children:
+        try:
+            total += proc.memory_info().rss
+        except psutil.Error:
+            pass   # renderer exited between listing and reading
+    return total / (1024 * 1024)
+
+
+def driver_needs_recycle(driver, speed: SpeedProfile) -> bool:
+    """Counts one more page on `driver` (across runs); True when it should be replaced."""
+    pages = getattr(driver, "ytj_pages", 0) + 1
+    driver.ytj_pages = pages
+    if speed.driver_recycle_pages and pages >= speed.driver_recycle_pages:
+        return True
+    if speed.driver_recycle_mem_mb and pages % RECYCLE_MEM_CHECK_EVERY == 0:
+        return driver_memory_mb(driver) >= speed.driver_recycle_mem_mb
+    return False
+
+
+@dataclass
+class WorkerHooks:
+    """What a YTJ page worker needs from the engine that runs it."""
+    next_job: Callable[[], Optional[str]]
+    on_done: Callable[[EmailResult], None]
+    requeue: Callable[[str], None]     # after a driver crash (counted)
+    retry: Callable[[str], None]       # after a block page (not counted)
+    ctl: AimdController                # one slot per page in flight
+    idle: Callable[[], bool]           # True when no job is waiting and none will come
+
+
+def settle_ytj_result(res: EmailResult, probe: bool, hooks: WorkerHooks) -> bool:
+    """
+    Feeds a finished page to the controller and the breaker, then hands it on;
+    a blocked page goes back to the queue instead. Returns True if blocked.
+    """
+    blocked = res.notes == YTJ_BLOCKED_NOTE
+    hooks.ctl.release(not blocked and res.notes != YTJ_TIMEOUT_NOTE, res.latency)
+    YTJ_PAGE_BREAKER.record(blocked, probe)
+    if blocked:
+        hooks.retry(res.yt)
+    else:
+        hooks.on_done(res)
+    return blocked
+
+
+def run_single_ytj_worker(driver, hooks: WorkerHooks, held: int, stop_flag: threading.Event, speed: SpeedProfile) -> bool:
+    """
+    One page at a time; `held` slots were acquired by the caller already.
+    Returns True when the jobs ran out (or the breaker gave up), False when
+    the driver is due for recycling. On a driver error the in-flight YT is
+    requeued and the error re-raised.
+    """
+    ctl = hooks.ctl
+    while True:
+        probe = YTJ_PAGE_BREAKER.try_admit()
+        if probe is None:
+            # never sit on slots while the breaker is open: its probe may need them
+            for _ in range(held):
+                ctl.abandon()
+            held = 0
+            probe = YTJ_PAGE_BREAKER.admit(stop_flag)
+        if probe is None:
+            return True
+        if held:
+            held -= 1
+        elif not ctl.acquire(stop_flag, hooks.idle):
+            if probe:
+                YTJ_PAGE_BREAKER.abandon_probe()
+            return True
+        yt = hooks.next_job()
+        if yt is None:
+            ctl.abandon()
+            if probe:
+                YTJ_PAGE_BREAKER.abandon_probe()
+            if hooks.idle():
+                return True
+            time.sleep(0.05)  # more is on its way
+            continue
+        t0 = time.perf_counter()
+        try:
+            res = fetch_email_by_yt(driver, yt, stop_flag, speed)
+        except Exception:
+            ctl.release(False, time.perf_counter() - t0)
+            if probe:
+                YTJ_PAGE_BREAKER.abandon_probe()
+            hooks.requeue(yt)
+            raise
+        res.latency = time.perf_counter() - t0
+        settle_ytj_result(res, probe, hooks)
+
+        if speed.ytj_per_company_sleep > 0:
+            time.sleep(speed.ytj_per_company_sleep)
+        if driver_needs_recycle(driver, speed):
+            return False
+
+
+def run_tabbed_ytj_worker(
+    driver,
+    tabs: int,
+    hooks: WorkerHooks,
+    held: int,
+    stop_flag: threading.Event,
+    speed: SpeedProfile,
+) -> bool:
+    """
+    Drives `tabs` YTJ company pages concurrently in one Chrome: every idle tab
+    that gets a concurrency slot is navigated without blocking, then whichever
+    tab settles first is harvested and refilled; on_done gets its EmailResult
+    with latency set. Same contract as run_single_ytj_worker; when recycling,
+    in-flight tabs are finished first. While the breaker is open no tab is
+    refilled; the one that gets the probe goes alone.
+    """
+    ctl = hooks.ctl
+    handles = open_worker_tabs(driver, tabs)
+    cap: Optional[CdpJsonCapture] = getattr(driver, "ytj_json", None)
+    inflight: Dict[str, Tuple[str, float, bool]] = {}
+    exhausted = False
+    recycle = False
+    try:
+        while not stop_flag.is_set():
+            for h in handles:
+                if exhausted or recycle or h in inflight:
+                    continue
+                probe = YTJ_PAGE_BREAKER.try_admit()
+                if probe is None:
+                    # breaker open: harvest what is in flight, or wait it out
+                    if inflight:
+                        break
+                    for _ in range(held):
+                        ctl.abandon()  # the probe may need the slot
+                    held = 0
+                    probe = YTJ_PAGE_BREAKER.admit(stop_flag)
+                    if probe is None:
+                        exhausted = True
+                        break
+                if held:
+                    held -= 1
+                elif not ctl.try_acquire():
+                    # with nothing in flight we may wait; otherwise keep harvesting
+                    if inflight or not ctl.acquire(stop_flag, hooks.idle):
+                        if probe:
+                            YTJ_PAGE_BREAKER.abandon_probe()
+                        if not inflight:
+                            exhausted = True
+                        break
+                yt = hooks.next_job()
+                if yt is None:
+                    ctl.abandon()
+                    if probe:
+                        YTJ_PAGE_BREAKER.abandon_probe()
+                    exhausted = hooks.idle()
+                    break
+                inflight[h] = (yt, time.perf_counter(), probe)
+                driver.switch_to.window(h)
+                if cap is not None:
+                    cap.reset(h)
+                RATE_LIMITER.acquire(YTJ_COMPANY_URL, stop_flag=stop_flag)
+                driver.execute_script("window.location.href = arguments[0];", YTJ_COMPANY_URL.format(yt))
+                if speed.ytj_per_company_sleep > 0:
+                    time.sleep(speed.ytj_per_company_sleep)
+
+            if not inflight:
+                if exhausted or recycle:
+                    break
+                time.sleep(0.05)  # more is on its way
+                continue
+
+            harvested = False
+            for h, (yt, t0, probe) in list(inflight.items()):
+                if stop_flag.is_set():
+                    break
+                res: Optional[EmailResult] = None
+                # response bodies are read from the focused target, so focus first
+                driver.switch_to.window(h)
+                if cap is not None:
+                    _, email = cap.take_email(h, yt)
+                    if email:
+                        res = EmailResult(yt=yt, email=email, attempts=1, notes="cdp json")
+                if res is None:
+                    state = probe_ytj_tab(driver, yt, t0, speed)
+                    if state is None:
+                        continue
+                    try_accept_cookies(driver, YTJ_COMPANY_URL.format(yt))
+                    res = finish_ytj_company(driver, yt, state, stop_flag, speed)
+                res.latency = time.perf_counter() - t0
+                del inflight[h]
+                if settle_ytj_result(res, probe, hooks):
+                    exhausted = False  # its YT is back in the queue
+                harvested = True
+                if driver_needs_recycle(driver, speed):
+                    recycle = True
+            if not harvested:
+                time.sleep(0.05)
+    except Exception:
+        for yt, t0, probe in inflight.values():
+            ctl.release(False, time.perf_counter() - t0)
+            if probe:
+                YTJ_PAGE_BREAKER.abandon_probe()
+            hooks.requeue(yt)
+        inflight.clear()
+        raise
+    finally:
+        # stopped mid-flight: the slots go back without feedback
+        for _ in range(len(inflight) + held):
+            ctl.abandon()
+        if any(probe for _, _, probe in inflight.values()):
+            YTJ_PAGE_BREAKER.abandon_probe()
+        close_worker_tabs(driver, handles)
+    return not recycle
+
+
+# =========================
+#   YTJ EMAIL (CDP network capture)
+# =========================
+EMAIL_KEY_RE = re.compile(r"e-?mail|s[aä]hk[oö]posti", re.I)
+
+
+def json_mentions_yt(data, yt: str) -> bool:
+    """True if some string or number in the payload is the Y-tunnus itself."""
+    wanted = {yt, yt.replace("-", "")}
+    stack = [data]
+    while stack:
+        cur = stack.pop()
+        if isinstance(cur, dict):
+            stack.extend(cur.values())
+        elif isinstance(cur, list):
+            stack.extend(cur)
+        elif isinstance(cur, (str, int)) and str(cur).strip() in wanted:
+            return True
+    return False
+
+
+def email_from_json(data, yt: str) -> str:
+    """
+    First email in a decoded JSON payload about `yt`: email-like keys first,
+    then any string value. Payloads that do not carry the Y-tunnus (site
+    config, footers, other companies) never answer.
+    """
+    if not json_mentions_yt(data, yt):
+        return ""
+    loose: List[str] = []
+    stack = [data]
+    while stack:
+        cur = stack.pop()
+        if isinstance(cur, dict):
+            for k, v in cur.items():
+                if isinstance(v, str):
+                    if EMAIL_KEY_RE.search(str(k)):
+                        email = pick_email_from_text(v)
+                        if email:
+                            return email
+                    elif "@" in v:
+                        loose.append(v)
+                else:
+                    stack.append(v)
+        elif isinstance(cur, list):
+            stack.extend(cur)
+        elif isinstance(cur, str) and "@" in cur:
+            loose.append(cur)
+    for v in loose:
+        if EMAIL_RE.fullmatch(v.strip()):
+            return v.strip()
+    return ""
+
+
+class CdpJsonCapture:
+    """
+    Finished YTJ JSON responses from a worker driver's performance log, per tab
+    (a log entry's "webview" is the tab's window handle). Reading a body is one
+    Network.getResponseBody call, so no rendering or DOM scraping is needed.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self._pending: Dict[str, str] = {}       # requestId -> webview
+        self._ready: Dict[str, List[str]] = {}   # webview -> finished requestIds
+
+    def poll(self):
+        try:
+            entries = self.driver.get_log("performance")
+        except Exception:
+            return
+        for entry in entries:
+            try:
+                msg = json.loads(entry["message"])
+            except Exception:
+                continue
+            webview = msg.get("webview", "")
+            m = msg.get("message") or {}
+            method = m.get("method")
+            params = m.get("params") or {}
+            if method == "Network.responseReceived":
+                resp = params.get("response") or {}
+                if "json" in (resp.get("mimeType") or "") and "ytj.fi" in (resp.get("url") or ""):
+                    self._pending[params.get("requestId", "")] = webview
+            elif method == "Network.loadingFinished":
+                wv = self._pending.pop(params.get("requestId", ""), None)
+                if wv is not None:
+                    self._ready.setdefault(wv, []).append(params.get("requestId", ""))
+
+    def reset(self, handle: Optional[str]):
+        """Forget what was seen for a tab (None = all tabs); call right before navigating it."""
+        self.poll()
+        if handle is None:
+            self._ready.clear()
+            self._pending.clear()
+            return
+        self._ready.pop(handle, None)
+        if len(self._ready) > 32:
+            # responses from tabs nobody asks for (closed tabs) must not pile up
+            self._ready.clear()
+        self._pending = {r: wv for r, wv in self._pending.items() if wv != handle}
+
+    def take_email(self, handle: Optional[str], yt: str) -> Tuple[int, str]:
+        """
+        (json responses read, email for `yt`) for the current tab, which must
+        be focused (getResponseBody acts on the focused target); handle=None
+        accepts responses from any tab (single-tab workers).
+        """
+        self.poll()
+        if handle is None:
+            rids = [r for lst in self._ready.values() for r in lst]
+            self._ready.clear()
+        else:
+            rids = self._ready.pop(handle, [])
+        seen = 0
+        for rid in rids:
+            try:
+                body = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": rid})
+                text = body.get("body") or ""
+                if body.get("base64Encoded"):
+                    text = base64.b64decode(text).decode("utf-8", "replace")
+                data = json.loads(text)
+            except Exception:
+                continue
+            seen += 1
+            email = email_from_json(data, yt)
+            if email:
+                return seen, email
+        return seen, ""
+
+
+# =========================
+#   YTJ EMAIL (HTTP, no browser)
+# =========================
+def make_pooled_session(pool_size: int) -> requests.Session:
+    """Keep-alive session whose connection pool fits `pool_size` threads."""
+    sess = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(1, pool_size))
+    sess.mount("https://", adapter)
+    sess.mount("http://", adapter)
+    sess.headers.update({"Accept-Encoding": "gzip, deflate"})
+    return sess
+
+
+def parse_ytj_details_xml(text: str) -> Optional[str]:
+    """
+    Email from a wmYritysTiedot response. "" = the company has contact info but
+    no email; None = the response cannot answer (no contact block at all).
+    """
+    root = ET.fromstring(text)
+    has_contact = False
+    for el in root.iter():
+        tag = el.tag.rsplit("}", 1)[-1].lower()
+        if "yhteystie" in tag or "sahkoposti" in tag or "email" in tag:
+            has_contact = True
+        txt = (el.text or "").strip()
+        if "@" in txt or "(a)" in txt:
+            email = pick_email_from_text(txt)
+            if email:
+                return email
+    return "" if has_contact else None
+
+
+@dataclass
+class YtjCredentials:
+    customer: str   # asiakastunnus
+    key: str        # avain (never sent)
+
+    def signed_params(self) -> Dict[str, str]:
+        """asiakastunnus / aikaleima / tarkiste for one request: tarkiste = SHA1(asiakastunnus + avain + aikaleima)."""
+        stamp = time.strftime("%Y%m%d%H%M%S") + "00"   # yyyyMMddHHmmssff
+        check = hashlib.sha1((self.customer + self.key + stamp).encode("utf-8")).hexdigest().upper()
+        return {"asiakastunnus": self.customer, "aikaleima": stamp, "tarkiste": check}
+
+
+def ytj_credentials() -> Optional[YtjCredentials]:
+    """Credentials from YTJ_ASIAKASTUNNUS / YTJ_AVAIN, or None if not configured."""
+    customer = os.environ.get(YTJ_CUSTOMER_ENV, "").strip()
+    key = os.environ.get(YTJ_KEY_ENV, "").strip()
+    if not (customer and key):
+        return None
+    return YtjCredentials(customer, key)
+
+
+MAILTO_HTML_RE = re.compile(r"""mailto:([^"'?<>\s]+)""", re.I)
+# Text of the consent wall itself. Vendor names (Cookiebot, OneTrust) and the
+# footer "Evästeasetukset" link are on every page and say nothing.
+CONSENT_MARKERS = ("hyväksy kaikki evästeet", "hyväksy evästeet jatkaaksesi", "cookie consent required")
+HTTP_MAX_SESSION_REFRESHES = 3
+
+
+class YtjHttpClient:
+    """
+    YT -> email over plain HTTP with a pooled session, no browser: signed
+    wmYritysTiedot requests when `credentials` are configured. fetch_email()
+    returns None when this path cannot answer; those YTs go to the Selenium
+    workers. A throttling / challenge response raises YtjBlocked.
+    `details_url` may point at a local stub server serving recorded responses.
+
+    Hybrid mode (works without credentials): seed_from_driver() copies a
+    consented browser session (cookies + user agent) into the pool, company
+    pages are tried as well, and `session_refresher` is called to
+    re-establish the session when page responses turn into consent pages or
+    redirects.
+    """
+
+    def __init__(
+        self,
+        pool_size: int,
+        timeout: float,
+        credentials: Optional[YtjCredentials] = None,
+        details_url: str = YTJ_SOAP_DETAILS_HTTPGET,
+        session_refresher: Optional[Callable[["YtjHttpClient"], None]] = None,
+    ):
+        self.credentials = credentials
+        self.details_url = details_url
+        self.timeout = timeout
+        self.session = make_pooled_session(pool_size)
+        self.page_fallback = False
+        self.refreshes = 0
+        self._refresher = session_refresher
+        self._refresh_lock = threading.Lock()
+        self._generation = 0
+
+    def seed_from_driver(self, driver):
+        for c in driver.get_cookies():
+            self.session.cookies.set(c["name"], c["value"], domain=c.get("domain"), path=c.get("path") or "/")
+        try:
+            ua = driver.execute_script("return navigator.userAgent;")
+        except Exception:
+            ua = ""
+        if ua:
+            self.session.headers["User-Agent"] = ua
+        self.session.headers["Referer"] = YTJ_HOME_URL
+        self.page_fallback = True
+
+    def _needs_refresh(self, r, yt: str) -> bool:
+        """Consent required: redirected / refused, or a consent wall instead of the company."""
+        if r.is_redirect or r.status_code in (401, 403):
+            return True
+        text = r.text or ""
+        if yt in text:
+            return False
+        head = text[:20000].lower()
+        return any(m in head for m in CONSENT_MARKERS)
+
+    def _refresh(self, seen_generation: int) -> bool:
+        """True if the session is newer than `seen_generation` afterwards."""
+        with self._refresh_lock:
+            if self._generation != seen_generation:
+                return True  # another thread refreshed already
+            if self.refreshes >= HTTP_MAX_SESSION_REFRESHES:
+                return False
+            self.refreshes += 1
+            try:
+                self._refresher(self)
+            except Exception:
+                pass
+            self._generation += 1
+            return True
+
+    def _get(self, yt: str, url: str, params: Optional[Dict[str, str]] = None, session_bound: bool = True):
+        """GET; `session_bound` requests (company pages) may trigger a session refresh."""
+        gen = self._generation
+        RATE_LIMITER.acquire(url)
+        r = self.session.get(url, params=params, timeout=self.timeout, allow_redirects=False)
+        if session_bound and self._refresher is not None and self._needs_refresh(r, yt) and self._refresh(gen):
+            RATE_LIMITER.acquire(url)
+            r = self.session.get(url, params=params, timeout=self.timeout, allow_redirects=False)
+        return r
+
+    @property
+    def admission_url(self) -> str:
+        """URL whose host's breaker a fetch_email() call should be admitted by."""
+        return self.details_url if self.credentials is not None else YTJ_COMPANY_URL
+
+    def fetch_email(self, yt: str) -> Optional[str]:
+        if self.credentials is None:
+            # hybrid mode only: the company page is the first request
+            return self.fetch_email_from_page(yt) if self.page_fallback else None
+        email = self.fetch_details(yt)
+        # company pages are the browser workers' host too: leave them alone while it is throttled
+        if email is None and self.page_fallback and YTJ_PAGE_BREAKER.closed():
+            email = self.fetch_email_from_page(yt)
+        return email
+
+    def fetch_details(self, yt: str) -> Optional[str]:
+        """Signed wmYritysTiedot; a refusal here is about the signature, not the browser session."""
+        params = {"ytunnus": yt, "kieli": "fi", "tiketti": "", **self.credentials.signed_params()}
+        try:
+            r = self._get(yt, self.details_url, params, session_bound=False)
+            if looks_blocked(r.status_code, r.text, yt):
+                raise YtjBlocked(f"HTTP {r.status_code}", host_of(self.details_url))
+            if r.status_code == 200 and yt in r.text:
+                return parse_ytj_details_xml(r.text)
+        except (requests.RequestException, ET.ParseError):
+            pass
+        return None
+
+    def fetch_email_from_page(self, yt: str) -> Optional[str]:
+        """Company page HTML; only a server-rendered mailto counts as an answer."""
+        try:
+            r = self._get(yt, YTJ_COMPANY_URL.format(yt))
+        except requests.RequestException:
+            return None
+        if looks_blocked(r.status_code, r.text, yt):
+            raise YtjBlocked(f"HTTP {r.status_code}", host_of(YTJ_COMPANY_URL))
+        if r.status_code != 200:
+            return None
+        m = MAILTO_HTML_RE.search(r.text or "")
+        return m.group(1).strip() if m else None
+
+    def close(self):
+        self.session.close()
+
+
+def establish_ytj_http_session(pool: "DriverPool", speed: SpeedProfile, client: YtjHttpClient):
+    """Hybrid mode: one browser opens YTJ, accepts consent and hands its session to `client`."""
+    drv = pool.checkout(speed)
+    broken = False
+    try:
+        RATE_LIMITER.acquire(YTJ_HOME_URL)
+        try:
+            drv.get(YTJ_HOME_URL)
+        except TimeoutException:
+            pass
+        try:
+            wait_loaded(drv, timeout=speed.ytj_page_load_timeout)
+        except Exception:
+            pass
+        # the session is being refreshed because consent lapsed: always look
+        try_accept_cookies(drv, YTJ_HOME_URL, force=True)
+        client.seed_from_driver(drv)
+    except Exception:
+        broken = True
+        raise
+    finally:
+        pool.checkin(drv, broken=broken)
+
+
+def fetch_emails_http(
+    src: YtFeed,
+    client: YtjHttpClient,
+    workers: int,
+    stop_flag: threading.Event,
+    on_result: Callable[[EmailResult], None],
+    on_left: Callable[[str], None],
+):
+    """
+    Answers what it can over HTTP (on_result per company) as YTs arrive in
+    `src`; each YT it cannot answer goes to on_left right away, for the next
+    stage. Returns once `src` is drained. A blocked request trips the breaker
+    of the host it went to first (details API, or company pages without
+    credentials) and is retried once it lets requests through again; a
+    blocked page fallback trips YTJ_PAGE_BREAKER and its YT is passed on.
+    """
+    brk = YTJ_BREAKERS.for_url(client.admission_url)
+
+    def one(yt: str) -> Tuple[Optional[str], float]:
+        while True:
+            probe = brk.admit(stop_flag)
+            if probe is None:
+                return None, 0.0
+            t0 = time.perf_counter()
+            try:
+                email = client.fetch_email(yt)
+            except YtjBlocked as e:
+                if e.host == brk.host:
+                    brk.record(True, probe)
+                    continue
+                # the details request went through; only the page fallback was blocked
+                brk.record(False, probe)
+                YTJ_BREAKERS.for_url(YTJ_COMPANY_URL).record(True)
+                return None, 0.0
+            except Exception:
+                if probe:
+                    brk.abandon_probe()
+                raise
+            brk.record(False, probe)
+            return email, time.perf_counter() - t0
+
+    def settle(fut, yt: str):
+        try:
+            email, latency = fut.result()
+        except Exception:
+            email, latency = None, 0.0
+        if email is None:
+            on_left(yt)
+        else:
+            on_result(EmailResult(yt=yt, email=email, latency=latency, attempts=1, notes="http"))
+
+    futs: Dict = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        while not stop_flag.is_set():
+            batch = src.take(max(1, workers) * 4, 0.1)
+            if batch is None:
+                break
+            for yt in batch:
+                futs[ex.submit(one, yt)] = yt
+            for fut in [f for f in futs if f.done()]:
+                settle(fut, futs.pop(fut))
+        for fut in as_completed(list(futs)):
+            if stop_flag.is_set():
+                for f in futs:
+                    f.cancel()
+                break
+            settle(fut, futs.pop(fut))
+
+
+# =========================
+#   YTJ EMAIL (in-browser fetch fan-out)
+# =========================
+FANOUT_MAX_TEMPLATES = 3   # company-page XHRs replayed per YT
+
+# URLs of the fetch/XHR requests a loaded company page made for arguments[0],
+# with the Y-tunnus replaced by {yt} (or {bare} when sent without the hyphen).
+YTJ_DISCOVER_XHR_JS = r"""
+var yt = arguments[0], bare = yt.replace("-", ""), out = [];
+performance.getEntriesByType("resource").forEach(function (e) {
+  if (e.initiatorType !== "fetch" && e.initiatorType !== "xmlhttprequest") return;
+  var t = e.name.indexOf(yt) >= 0 ? e.name.split(yt).join("{yt}")
+        : e.name.indexOf(bare) >= 0 ? e.name.split(bare).join("{bare}") : "";
+  if (t && out.indexOf(t) < 0) out.push(t);
+});
+return out;
+"""
+
+# Runs fetch() for every {key: url} from inside the loaded YTJ page (its origin and
+# cookies, fetch()'s default mode and headers), at most arguments[1] at a time,
+# each aborted after arguments[2] ms and started at least arguments[3] ms apart
+# (the host's rate limit).
+YTJ_FANOUT_JS = r"""
+var urls = arguments[0], limit = arguments[1], perMs = arguments[2], gapMs = arguments[3];
+var done = arguments[arguments.length - 1];
+var keys = Object.keys(urls), out = {}, i = 0, active = 0, nextAt = 0, timerSet = false;
+function one(yt) {
+  active++;
+  var ctl = window.AbortController ? new AbortController() : null;
+  var timer = ctl ? setTimeout(function () { ctl.abort(); }, perMs) : null;
+  fetch(urls[yt], {signal: ctl ? ctl.signal : undefined})
+    .then(function (r) {
+      return r.text().then(function (t) {
+        out[yt] = {status: r.status, type: r.headers.get("content-type") || "", body: t};
+      });
+    })
+    .catch(function () { out[yt] = {status: 0, type: "", body: ""}; })
+    .then(function () { clearTimeout(timer); active--; pump(); });
+}
+function pump() {
+  if (i >= keys.length && active === 0) { done(out); return; }
+  while (active < limit && i < keys.length) {
+    var now = Date.now();
+    if (now < nextAt) {
+      if (!timerSet) { timerSet = true; setTimeout(function () { timerSet = false; pump(); }, nextAt - now); }
+      return;
+    }
+    nextAt = now + gapMs;
+    one(keys[i++]);
+  }
+}
+pump();
+"""
+
+
+def email_from_payload(yt: str, status: int, ctype: str, body: str) -> Optional[str]:
+    """Email from a fetched YTJ response of any kind; None = cannot answer."""
+    if looks_blocked(status, body, yt):
+        raise YtjBlocked(f"HTTP {status}")
+    if status != 200 or not body or yt not in body:
+        return None
+    ctype = (ctype or "").lower()
+    try:
+        if "json" in ctype:
+            return email_from_json(json.loads(body), yt) or None
+        if "xml" in ctype:
+            return parse_ytj_details_xml(body)
+    except (ValueError, ET.ParseError):
+        return None
+    m = MAILTO_HTML_RE.search(body)
+    return m.group(1).strip() if m else None
+
+
+def fanout_url(template: str, yt: str) -> str:
+    return template.replace("{yt}", yt).replace("{bare}", yt.replace("-", ""))
+
+
+def discover_ytj_xhr(drv, yt: str, speed: SpeedProfile) -> List[str]:
+    """
+    Loads the company page of `yt` and returns the URL templates of the
+    fetch/XHR requests it made for it (the endpoints the page is allowed to call).
+    """
+    url = YTJ_COMPANY_URL.format(yt)
+    RATE_LIMITER.acquire(url)
+    try:
+        drv.get(url)
+    except TimeoutException:
+        pass
+    try_accept_cookies(drv, url)
+    if wait_ytj_contact(drv, yt, speed) == "blocked":
+        raise YtjBlocked("company page", host_of(url))
+    return list(drv.execute_script(YTJ_DISCOVER_XHR_JS, yt) or [])[:FANOUT_MAX_TEMPLATES]
+
+
+def fetch_contacts_in_page(
+    driver, templates: List[str], yts: List[str], speed: SpeedProfile
+) -> Tuple[Dict[str, Optional[str]], List[str]]:
+    """
+    One WebDriver call for a whole batch of Y-tunnus -> email lookups, replaying
+    each of the page's own XHRs (`templates`) per YT. Returns the answers and
+    the YTs that got a block page.
+    """
+    urls = {f"{yt}|{i}": fanout_url(t, yt) for yt in yts for i, t in enumerate(templates)}
+    # the batch pays for its tokens; the script spaces the requests itself
+    RATE_LIMITER.acquire(templates[0], n=len(urls))
+    gap_ms = int(RATE_LIMITER.interval(templates[0]) * 1000)
+    raw = driver.execute_async_script(
+        YTJ_FANOUT_JS, urls, max(1, speed.fetch_fanout), int(speed.soap_timeout * 1000), gap_ms
+    ) or {}
+    out: Dict[str, Optional[str]] = {}
+    blocked: List[str] = []
+    for yt in yts:
+        out[yt] = None
+        for i in range(len(templates)):
+            r = raw.get(f"{yt}|{i}") or {}
+            try:
+                email = email_from_payload(yt, int(r.get("status") or 0), r.get("type") or "", r.get("body") or "")
+            except YtjBlocked:
+                blocked.append(yt)
+                break
+            if email is not None:
+                out[yt] = email
+                break
+    return out, blocked
+
+
+FANOUT_GATHER_SECS = 1.0   # how long a streaming fan-out batch may wait to fill up
 
 
-def wait_loaded(driver, timeout=18):
-    WebDriverWait(driver, timeout).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+def open_fanout_page(drv, speed: SpeedProfile, batch: int, yt: str) -> List[str]:
+    """
+    Loads the company page of `yt`, whose origin the fetch() batches run in,
+    and returns the XHR templates to replay (empty = nothing to replay).
+    """
+    templates = discover_ytj_xhr(drv, yt, speed)
+    if templates:
+        # a batch may take a few request timeouts plus the rate-limit spacing
+        n = batch * len(templates)
+        drv.set_script_timeout(speed.soap_timeout * 4 + n * RATE_LIMITER.interval(templates[0]) + 10)
+    return templates
 
 
-def try_accept_cookies(driver):
-    texts = ["Hyväksy", "Hyväksy kaikki", "Salli kaikki", "Accept", "Accept all", "I agree", "OK", "Selvä"]
-    for _ in range(2):
-        for e in driver.find_elements(By.XPATH, "//button|//a|//*[@role='button']"):
+def fetch_emails_fanout(
+    src: YtFeed,
+    pool: "DriverPool",
+    speed: SpeedProfile,
+    stop_flag: threading.Event,
+    on_result: Callable[[EmailResult], None],
+    on_left: Callable[[str], None],
+):
+    """
+    Loads the company page of the first YT and answers YTs from `src` in
+    batches of fetch() calls run inside it, replaying the XHRs that page made
+    for its own company; what it cannot answer goes to
+    on_left. If the first batch answers nothing, or the page cannot be used,
+    the endpoint is treated as unusable and everything after it is passed
+    straight on. Batches wait for the breaker of the host they go to (the
+    company page's until the XHRs are known); block pages trip it and their
+    YTs are passed on to the workers. Returns once `src` is drained.
+    """
+    batch = max(1, speed.fetch_fanout) * 4
+    drv = None
+    templates: List[str] = []
+    broken = False
+    usable = True
+    answered_any = False
+
+    def release():
+        """Hands the Chrome back to the pool with the worker timeouts restored."""
+        nonlocal drv
+        if drv is None:
+            return
+        bad = broken
+        try:
+            apply_worker_timeouts(drv, speed)
+        except Exception:
+            bad = True
+        pool.checkin(drv, broken=bad)
+        drv = None
+
+    try:
+        while not stop_flag.is_set():
+            if not usable:
+                release()   # the workers can use it while the rest is passed on
+            chunk = src.take(batch, FANOUT_GATHER_SECS if usable else 0.1)
+            if chunk is None:
+                break
+            if not chunk:
+                continue
+            brk = YTJ_BREAKERS.for_url(templates[0] if templates else YTJ_COMPANY_URL)
+            probe = brk.admit(stop_flag) if usable else None
+            if probe is None:
+                usable = False
+                for yt in chunk:
+                    on_left(yt)
+                continue
+            t0 = time.perf_counter()
             try:
-                t = (e.text or "").strip()
-                if not t:
-                    continue
-                if any(x.lower() in t.lower() for x in texts):
-                    if e.is_displayed() and e.is_enabled():
-                        safe_click(driver, e)
-                        time.sleep(0.20)
-                        break
+                if drv is None:
+                    drv = pool.checkout(speed)
+                    templates = open_fanout_page(drv, speed, batch, chunk[0])
+                got, blocked = fetch_contacts_in_page(drv, templates, chunk, speed) if templates else ({}, [])
+            except YtjBlocked:
+                brk.record(True, probe)
+                usable = False
+                for yt in chunk:
+                    on_left(yt)
+                continue
             except Exception:
+                if probe:
+                    brk.abandon_probe()
+                broken = drv is not None
+                usable = False
+                for yt in chunk:
+                    on_left(yt)
                 continue
+            brk.record(bool(blocked), probe)
+            per = (time.perf_counter() - t0) / len(chunk)
+            for yt in chunk:
+                email = got.get(yt)
+                if email is None:
+                    on_left(yt)
+                    continue
+                answered_any = True
+                on_result(EmailResult(yt=yt, email=email, latency=per, attempts=1, notes="fetch fan-out"))
+            if not answered_any:
+                usable = False
+    finally:
+        release()
 
 
 # =========================
-#   YTJ EMAIL (Selenium)
+#   YTJ SOAP: NAME -> YT (FAST, PARALLEL)
 # =========================
-def extract_email_from_ytj(driver) -> str:
-    try:
-        for a in driver.find_elements(By.TAG_NAME, "a"):
-            href = (a.get_attribute("href") or "")
-            if href.lower().startswith("mailto:"):
-                return href.split(":", 1)[1].strip()
-    except Exception:
-        pass
+class YtjSoapClient:
+    """
+    Shared keep-alive session for the SOAP service (thread-safe): one
+    connection pool sized to the name workers, gzip, and preconnect() to pay
+    the TCP/TLS handshakes before the first query. counters() tells how many
+    queries went out and how many connections had to be opened for them.
+    """
 
-    try:
-        cells = driver.find_elements(By.XPATH, "//tr//*[self::td or self::th][contains(normalize-space(.), 'Sähköposti')]")
-        for c in cells:
+    SERVICE_URL = YTJ_SOAP_HTTPGET.rsplit("/", 1)[0]
+
+    def __init__(self, pool_size: int = 10):
+        self._lock = threading.Lock()
+        self.pool_size = 0
+        self.session = requests.Session()
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate"})
+        self._adapter: Optional[HTTPAdapter] = None
+        self._retired_connections = 0
+        self._queries = 0
+        self.resize(pool_size)
+
+    @staticmethod
+    def _opened(adapter: HTTPAdapter) -> int:
+        """Connections opened by every urllib3 pool of `adapter`."""
+        pools = adapter.poolmanager.pools
+        n = 0
+        for key in list(pools.keys()):
             try:
-                tr = c.find_element(By.XPATH, "ancestor::tr[1]")
-                email = pick_email_from_text(tr.text or "")
-                if email:
-                    return email
-            except Exception:
-                continue
-    except Exception:
-        pass
+                n += pools[key].num_connections
+            except KeyError:
+                pass
+        return n
 
-    try:
-        return pick_email_from_text(driver.find_element(By.TAG_NAME, "body").text or "")
-    except Exception:
-        return ""
+    def resize(self, pool_size: int):
+        """Grows the pool to `pool_size` connections (never shrinks)."""
+        with self._lock:
+            if pool_size <= self.pool_size:
+                return
+            old = self._adapter
+            self._adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+            self.session.mount("https://", self._adapter)
+            self.pool_size = pool_size
+            if old is not None:
+                # requests still on the old pool finish there; its connections are dropped
+                self._retired_connections += self._opened(old)
+
+    def preconnect(self, n: int = 1):
+        """Opens up to n keep-alive connections ahead of the first query (best effort)."""
+        def one():
+            try:
+                self.session.head(self.SERVICE_URL, timeout=5)
+            except requests.RequestException:
+                pass
 
+        threads = [threading.Thread(target=one, daemon=True) for _ in range(max(1, min(n, self.pool_size)))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
 
-def click_all_nayta_ytj(driver, speed: SpeedProfile):
-    for _ in range(speed.ytj_nayta_passes):
-        clicked = False
-        for b in driver.find_elements(By.TAG_NAME, "button"):
-            try:
-                if (b.text or "").strip().lower() == "näytä" and b.is_displayed() and b.is_enabled():
-                    safe_click(driver, b)
-                    clicked = True
-                    time.sleep(0.06)
-            except Exception:
-                continue
-        for a in driver.find_elements(By.TAG_NAME, "a"):
-            try:
-                if (a.text or "").strip().lower() == "näytä" and a.is_displayed():
-                    safe_click(driver, a)
-                    clicked = True
-                    time.sleep(0.06)
-            except Exception:
-                continue
-        if not clicked:
-            break
+    def get(self, params: Dict[str, str], timeout: float, stream: bool = False) -> requests.Response:
+        with self._lock:
+            self._queries += 1
+        return self.session.get(YTJ_SOAP_HTTPGET, params=params, timeout=timeout, stream=stream)
 
+    def counters(self) -> Tuple[int, int]:
+        """(queries sent, connections opened) since the client was created."""
+        with self._lock:
+            return self._queries, self._retired_connections + self._opened(self._adapter)
 
-def fetch_email_by_yt(driver, yt: str, stop_flag: threading.Event, speed: SpeedProfile) -> str:
-    if stop_flag.is_set():
-        return ""
-    try:
-        driver.get(YTJ_COMPANY_URL.format(yt))
-    except TimeoutException:
-        pass
 
-    try:
-        wait_loaded(driver, timeout=speed.ytj_page_load_timeout)
-    except Exception:
-        pass
-    try_accept_cookies(driver)
+YTJ_SOAP = YtjSoapClient()
 
-    for _ in range(2):
-        if stop_flag.is_set():
-            return ""
-        email = extract_email_from_ytj(driver)
-        if email:
-            return email
-        time.sleep(speed.ytj_retry_sleep)
 
-    click_all_nayta_ytj(driver, speed)
-    for _ in range(speed.ytj_retry_reads):
-        if stop_flag.is_set():
-            return ""
-        email = extract_email_from_ytj(driver)
-        if email:
-            return email
-        time.sleep(speed.ytj_retry_sleep)
-    return ""
+class SingleFlight:
+    """
+    Per-run lookup coalescing: the first do() for a key runs fn, concurrent
+    and later calls with the same key wait for and share its result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Tuple[threading.Event, list]] = {}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def do(self, key: str, fn: Callable[[], object]):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = (threading.Event(), [None, None])
+        done, slot = call
+        if not leader:
+            done.wait()
+        else:
+            try:
+                slot[0] = fn()
+            except Exception as e:
+                slot[1] = e
+            finally:
+                done.set()
+        if slot[1] is not None:
+            raise slot[1]
+        return slot[0]
 
 
-# =========================
-#   YTJ SOAP: NAME -> YT (FAST, PARALLEL)
-# =========================
 def ytj_soap_search_name(name: str, speed: SpeedProfile) -> List[Tuple[str, str]]:
     """
     Returns list of (ytunnus, yritysnimi) from SOAP HTTP GET.
     Public docs list wmYritysHaku over HTTP GET and response schema. :contentReference[oaicite:2]{index=2}
     """
-    params = {
+    RATE_LIMITER.acquire(YTJ_SOAP_HTTPGET)
+    r = YTJ_SOAP.get(soap_search_params(name), timeout=speed.soap_timeout, stream=True)
+    try:
+        r.raise_for_status()
+        parser = SoapSearchParser(name, max(5, speed.soap_max_results))
+        for chunk in r.iter_content(SOAP_READ_CHUNK):
+            if not parser.feed(chunk):
+                break
+        parser.close()
+        return parser.results
+    finally:
+        r.close()
+
+
+def soap_search_params(name: str) -> Dict[str, str]:
+    return {
         "hakusana": name,
         "yritysmuoto": "",
         "sanahaku": "true",
@@ -610,57 +2652,107 @@ def ytj_soap_search_name(name: str, speed: SpeedProfile) -> List[Tuple[str, str]
         "tiketti": "",
     }
 
-    r = requests.get(YTJ_SOAP_HTTPGET, params=params, timeout=speed.soap_timeout)
-    r.raise_for_status()
 
-    # Parse XML
-    # Root has namespace: http://www.ytj.fi/
-    xml = r.text
-    root = ET.fromstring(xml)
+SOAP_READ_CHUNK = 16 * 1024
+SOAP_DRAIN_MAX = 64 * 1024        # after an early stop, read at most this much more to keep the connection
+SOAP_NEAR_PERFECT_SCORE = 115.0   # best_name_match_score of an (almost) exact name
+SOAP_ERROR_TAGS = ("Fault", "Virhe", "Virheet", "Error")   # non-empty = the service refused
 
-    ns = {"n": "http://www.ytj.fi/"}
-    out: List[Tuple[str, str]] = []
 
-    for dto in root.findall(".//n:YritysHakuDTO", ns):
-        yt = (dto.findtext("n:YTunnus", default="", namespaces=ns) or "").strip()
-        nm = (dto.findtext("n:Yritysnimi", default="", namespaces=ns) or "").strip()
-        if yt and nm:
-            n_yt = normalize_yt(yt)
-            if n_yt:
-                out.append((n_yt, nm))
+class SoapSearchError(Exception):
+    """wmYritysHaku answered 200 with something other than a complete result document."""
 
-    return out[: max(5, speed.soap_max_results)]
 
-
-def resolve_name_to_best_yt(name: str, speed: SpeedProfile) -> Tuple[str, str]:
+class SoapSearchParser:
     """
-    Returns (yt, matched_name).
+    Incremental wmYritysHaku parser: feed() it response chunks as they arrive
+    and (ytunnus, yritysnimi) pairs are collected as each YritysHakuDTO
+    closes. Parsing stops once `limit` candidates are in or one matches
+    `query` near-perfectly; feed() returns False when reading can stop.
+    close() raises SoapSearchError unless the response was a complete,
+    error-free result document (or stopped early on results), so an empty
+    `results` always means "no such company".
     """
-    try:
-        results = ytj_soap_search_name(name, speed)
-    except Exception:
-        return "", ""
 
-    if not results:
-        return "", ""
+    NS = {"n": "http://www.ytj.fi/"}
+
+    def __init__(self, query: str, limit: int):
+        self.query = query
+        self.limit = limit
+        self.results: List[Tuple[str, str]] = []
+        self.done = False
+        self._drained = 0
+        self._root_ok: Optional[bool] = None
+        self._error = False
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+
+    def feed(self, chunk: bytes) -> bool:
+        if self.done:
+            # small leftovers are read so the keep-alive connection can be reused
+            self._drained += len(chunk)
+            return self._drained <= SOAP_DRAIN_MAX
+        self._parser.feed(chunk)
+        for ev, el in self._parser.read_events():
+            if ev == "start":
+                if self._root_ok is None:
+                    self._root_ok = el.tag.startswith("{" + self.NS["n"] + "}")
+                continue
+            tag = el.tag.rsplit("}", 1)[-1]
+            if tag in SOAP_ERROR_TAGS and ((el.text or "").strip() or len(el)):
+                self._error = True
+            if tag != "YritysHakuDTO":
+                continue
+            yt = normalize_yt((el.findtext("n:YTunnus", default="", namespaces=self.NS) or "").strip())
+            nm = (el.findtext("n:Yritysnimi", default="", namespaces=self.NS) or "").strip()
+            el.clear()
+            if not (yt and nm):
+                continue
+            self.results.append((yt, nm))
+            if len(self.results) >= self.limit or best_name_match_score(self.query, nm) >= SOAP_NEAR_PERFECT_SCORE:
+                self.done = not self._error
+                break
+        return True
 
+    def close(self):
+        """End of the response; a document that stopped early is not validated further."""
+        if self.done:
+            return
+        try:
+            self._parser.close()
+        except ET.ParseError as e:
+            raise SoapSearchError(f"truncated or malformed response ({e})")
+        if not self._root_ok or self._error:
+            raise SoapSearchError("not a wmYritysHaku result document")
+
+
+def best_candidate(name: str, results: List[Tuple[str, str]]) -> Tuple[str, str, float]:
+    """Highest-scoring (yt, matched_name, score) among SOAP results; ("", "", 0.0) if none."""
     best = ("", "", -1.0)
     for yt, nm in results:
         s = best_name_match_score(name, nm)
         best = (yt, nm, s) if s > best[2] else best
+    return best if best[0] else ("", "", 0.0)
 
-    yt_best, nm_best, score = best
+
+def accept_match(yt: str, matched: str, score: float, speed: SpeedProfile) -> Tuple[str, str]:
+    if not yt:
+        return "", ""
 
     # Turbo can accept slightly weaker matches
     if speed.turbo_relaxed_match:
-        return yt_best, nm_best
+        return yt, matched
 
     # Normal/Fast/Safe: require a decent score
     if score >= 70.0:
-        return yt_best, nm_best
+        return yt, matched
     return "", ""
 
 
+def pick_best_yt(name: str, results: List[Tuple[str, str]], speed: SpeedProfile) -> Tuple[str, str]:
+    """Best (yt, matched_name) among SOAP results, or ("", "") if none is good enough."""
+    return accept_match(*best_candidate(name, results), speed)
+
+
 # =========================
 #   PIPELINES (C)
 # =========================
@@ -673,7 +2765,16 @@ def _emails_from_rows(rows: List[Row]) -> List[str]:
     return sorted(m.values())
 
 
-def pipeline_pdf(pdf_path: str, status_cb, progress_cb, stop_flag: threading.Event, speed: SpeedProfile):
+def pipeline_pdf(
+    pdf_path: str,
+    status_cb,
+    progress_cb,
+    stop_flag: threading.Event,
+    speed: SpeedProfile,
+    events: Optional[ResultStream] = None,
+    pool: Optional[DriverPool] = None,
+):
+    RATE_LIMITER.configure(speed.host_rates)
     status_cb("PDF: Luetaan ja kerätään Y-tunnukset…")
     yts = extract_ytunnukset_from_pdf(pdf_path)
     if not yts:
@@ -683,7 +2784,7 @@ def pipeline_pdf(pdf_path: str, status_cb, progress_cb, stop_flag: threading.Eve
     status_cb(f"PDF: löytyi {len(yts)} Y-tunnusta. Haetaan emailit YTJ:stä…")
 
     # Parallel email fetch with multiple drivers (C)
-    rows = fetch_emails_parallel(yts, stop_flag, status_cb, progress_cb, speed, source="pdf->ytj")
+    rows = fetch_emails_parallel(yts, stop_flag, status_cb, progress_cb, speed, source="pdf->ytj", events=events, pool=pool)
     return rows, _emails_from_rows(rows)
 
 
@@ -696,7 +2797,10 @@ def pipeline_paste(
     progress_cb,
     stop_flag: threading.Event,
     speed: SpeedProfile,
+    events: Optional[ResultStream] = None,
+    pool: Optional[DriverPool] = None,
 ):
+    RATE_LIMITER.configure(speed.host_rates)
     status_cb("Paste: poimitaan sähköpostit ja Y-tunnukset…")
 
     direct_emails = set(e.strip().lower() for e in EMAIL_RE.findall(text or "") if e.strip())
@@ -725,10 +2829,33 @@ def pipeline_paste(
         else:
             status_cb(f"Paste: löytyi {len(names)} nimeä. Haetaan Y-tunnukset (SOAP) rinnakkain…")
 
-    # C: resolve names -> YTs in parallel (NO Selenium here)
+    # C: resolve names -> YTs in parallel (NO Selenium here); every resolved YT
+    # goes straight to the email stage, which runs alongside the resolution
+    feed = YtFeed(yts)
     name_to_yt: Dict[str, Tuple[str, str]] = {}
-    if names:
-        name_to_yt = resolve_names_parallel(names, stop_flag, status_cb, progress_cb, speed)
+    fetched_rows: List[Row] = []
+    if yts or names:
+        if yts:
+            status_cb(f"YTJ: haetaan emailit ({len(yts)} Y-tunnusta) rinnakkain…")
+
+        def on_resolved(nm: str, hit: Tuple[str, str]):
+            if hit[0]:
+                feed.put([hit[0]])
+
+        with ThreadPoolExecutor(max_workers=1) as ex:
+            fetch = ex.submit(
+                fetch_emails_parallel, [], stop_flag, status_cb, progress_cb, speed,
+                source="paste->ytj", events=events, pool=pool, feed=feed,
+            )
+            try:
+                if names:
+                    # the progress bar follows the email stage, whose total grows
+                    name_to_yt = resolve_names_parallel(
+                        names, stop_flag, status_cb, lambda done, total: None, speed, on_resolved=on_resolved
+                    )
+            finally:
+                feed.close()
+            fetched_rows = fetch.result()
 
         for nm in names:
             yt, matched = name_to_yt.get(nm, ("", ""))
@@ -752,15 +2879,10 @@ def pipeline_paste(
         status_cb("Paste: en löytänyt mitään (email / Y-tunnus / nimi).")
         return [], []
 
-    # fetch emails for YTs (parallel)
-    yts_to_fetch = sorted({r.yt for r in rows if r.yt and not r.email})
-    if not yts_to_fetch:
+    if not feed.total:
         status_cb("Paste: valmista (ei YTJ email-hakuja).")
         return rows, _emails_from_rows(rows)
 
-    status_cb(f"YTJ: haetaan emailit ({len(yts_to_fetch)} Y-tunnusta) rinnakkain…")
-    fetched_rows = fetch_emails_parallel(yts_to_fetch, stop_flag, status_cb, progress_cb, speed, source="paste->ytj")
-
     yt_to_email = {r.yt: r.email for r in fetched_rows if r.yt}
     for r in rows:
         if r.yt and not r.email:
@@ -777,46 +2899,180 @@ def pipeline_protest_attach(
     progress_cb,
     stop_flag: threading.Event,
     speed: SpeedProfile,
+    events: Optional[ResultStream] = None,
+    pool: Optional[DriverPool] = None,
 ):
+    RATE_LIMITER.configure(speed.host_rates)
     status_cb("KL: Yhdistetään Chromeen (debug attach)…")
     driver = start_driver_attach_debug(port, speed)
 
-    yts: List[str] = []
-    try:
-        status_cb("KL: Avataan protestilista…")
-        klm.ensure_on_page(driver, url, status_cb=status_cb)
-
-        status_cb("KL: Ladataan kaikki (Näytä lisää)…")
-        klm.click_show_more_until_end(
-            driver,
-            stop_flag=stop_flag,
-            status_cb=status_cb,
-            max_passes=speed.kl_max_passes,
-            scroll_sleep=speed.kl_scroll_sleep,
-            post_click_sleep=speed.kl_post_click_sleep,
+    # YTJ lookups start on the first harvested rows and overlap the KL loading
+    feed = YtFeed()
+    limit = test_limit if test_limit and test_limit > 0 else 0
+    known = set()
+
+    def harvest(full: bool = False) -> bool:
+        """Hands newly visible YTs to the email engine; False once the test limit is reached."""
+        found = klm.extract_ytunnukset_via_js(driver) if full else klm.extract_new_ytunnukset_via_js(driver)
+        new = [yt for yt in found if yt not in known]
+        if limit:
+            new = new[:max(0, limit - len(known))]
+        if new:
+            known.update(new)
+            feed.put(new)
+            status_cb(f"KL: {len(known)} Y-tunnusta, YTJ-haku käynnissä…")
+        return not limit or len(known) < limit
+
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        fetch = ex.submit(
+            fetch_emails_parallel, [], stop_flag, status_cb, progress_cb, speed,
+            source="protest->ytj", events=events, pool=pool, feed=feed,
         )
-
-        status_cb("KL: Kerätään Y-tunnukset (JS/regex)…")
-        yts = klm.extract_ytunnukset_via_js(driver)
-        if not yts:
-            status_cb("KL: Ei löytynyt Y-tunnuksia. Oletko kirjautunut ja protestilista auki?")
-            return [], []
-    finally:
         try:
-            driver.quit()
-        except Exception:
-            pass
-
-    if test_limit and test_limit > 0:
-        yts = yts[:test_limit]
-        status_cb(f"TEST RUN: käsitellään vain {len(yts)} ensimmäistä Y-tunnusta…")
-    else:
-        status_cb(f"KL: Löytyi {len(yts)} Y-tunnusta. Haetaan YTJ emailit…")
+            status_cb("KL: Avataan protestilista…")
+            klm.ensure_on_page(driver, url, status_cb=status_cb)
+
+            if harvest():
+                status_cb("KL: Ladataan kaikki (Näytä lisää)…")
+                klm.click_show_more_until_end(
+                    driver,
+                    stop_flag=stop_flag,
+                    status_cb=status_cb,
+                    max_passes=speed.kl_max_passes,
+                    scroll_sleep=speed.kl_scroll_sleep,
+                    post_click_sleep=speed.kl_post_click_sleep,
+                    throttle=lambda: RATE_LIMITER.acquire(klm.KL_ALLOWED_PREFIX, stop_flag=stop_flag),
+                    on_more=harvest,
+                )
+                status_cb("KL: Kerätään loput Y-tunnukset (JS/regex)…")
+                harvest(full=True)
+        finally:
+            feed.close()
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        rows = fetch.result()
 
-    rows = fetch_emails_parallel(yts, stop_flag, status_cb, progress_cb, speed, source="protest->ytj")
+    if not known:
+        status_cb("KL: Ei löytynyt Y-tunnuksia. Oletko kirjautunut ja protestilista auki?")
+        return [], []
+    if limit:
+        status_cb(f"TEST RUN: käsiteltiin vain {len(known)} ensimmäistä Y-tunnusta.")
     return rows, _emails_from_rows(rows)
 
 
+# =========================
+#   NAME -> YT CACHE (SQLite, across runs)
+# =========================
+NAME_CACHE_FILE = "name_cache.sqlite3"
+NAME_CACHE_TTL_DAYS = 30.0       # lookups that returned candidates
+NAME_CACHE_MISS_TTL_DAYS = 2.0   # complete result documents with no candidates
+NAME_CACHE_BULK = 500            # keys per SELECT ... IN (...)
+
+
+class NameCache:
+    """
+    Persistent canonical_name_key -> SOAP candidates [(yt, name), ...] and
+    fetched_at, consulted before any SOAP call. Every name asking for a key
+    picks its own best candidate from the list (pick_best_yt), under its
+    speed profile's threshold. An empty list is a miss and expires sooner.
+    One connection behind a lock serves every worker thread; entries older
+    than their TTL are ignored and overwritten by the next lookup. Fails
+    soft: if the file cannot be opened, the cache is simply empty.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl_days: float = NAME_CACHE_TTL_DAYS,
+        miss_ttl_days: float = NAME_CACHE_MISS_TTL_DAYS,
+    ):
+        self.path = path
+        self.ttl = ttl_days * 86400.0
+        self.miss_ttl = miss_ttl_days * 86400.0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._failed = False
+
+    def _conn(self) -> Optional[sqlite3.Connection]:
+        """Opens the database on first use (caller holds the lock)."""
+        if self._db is None and not self._failed:
+            try:
+                if self.path is None:
+                    root = base_output_dir()
+                    os.makedirs(root, exist_ok=True)
+                    self.path = os.path.join(root, NAME_CACHE_FILE)
+                db = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=NORMAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS lookups ("
+                    "key TEXT PRIMARY KEY, candidates TEXT NOT NULL, fetched_at REAL NOT NULL)"
+                )
+                self._db = db
+            except (sqlite3.Error, OSError):
+                self._failed = True
+        return self._db
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[Tuple[str, str]]]:
+        """Fresh candidate lists for `keys` (bulk lookup); stale or unknown keys are absent."""
+        keys = sorted(set(keys))
+        now = time.time()
+        out: Dict[str, List[Tuple[str, str]]] = {}
+        with self._lock:
+            db = self._conn()
+            if db is None:
+                return out
+            for i in range(0, len(keys), NAME_CACHE_BULK):
+                chunk = keys[i:i + NAME_CACHE_BULK]
+                marks = ",".join("?" * len(chunk))
+                try:
+                    rows = db.execute(
+                        f"SELECT key, candidates, fetched_at FROM lookups WHERE key IN ({marks})", chunk
+                    ).fetchall()
+                except sqlite3.Error:
+                    return out
+                for key, raw, fetched_at in rows:
+                    try:
+                        candidates = [(str(yt), str(nm)) for yt, nm in json.loads(raw)]
+                    except (ValueError, TypeError):
+                        continue
+                    if now - fetched_at <= (self.ttl if candidates else self.miss_ttl):
+                        out[key] = candidates
+        return out
+
+    def put(self, key: str, candidates: List[Tuple[str, str]]):
+        with self._lock:
+            db = self._conn()
+            if db is None:
+                return
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO lookups (key, candidates, fetched_at) VALUES (?, ?, ?)",
+                    (key, json.dumps([list(c) for c in candidates], ensure_ascii=False), time.time()),
+                )
+            except sqlite3.Error:
+                pass
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                try:
+                    self._db.close()
+                except sqlite3.Error:
+                    pass
+                self._db = None
+
+
+NAME_CACHE = NameCache()
+
+
+def remember_lookup(name: str, results: List[Tuple[str, str]]):
+    """Stores the candidates of a completed SOAP lookup under the name's canonical key."""
+    NAME_CACHE.put(canonical_name_key(name), results)
+
+
 # =========================
 #   C: PARALLEL RESOLVE + PARALLEL EMAIL FETCH
 # =========================
@@ -825,28 +3081,96 @@ def resolve_names_parallel(
     stop_flag: threading.Event,
     status_cb,
     progress_cb,
-    speed: SpeedProfile
+    speed: SpeedProfile,
+    on_resolved: Optional[Callable[[str, Tuple[str, str]], None]] = None,
 ) -> Dict[str, Tuple[str, str]]:
     """
     Parallel: name -> (yt, matched_name) using SOAP.
-    Cache inside this run.
+    Runs on threads (resolve_names_threaded), or on the asyncio resolver when
+    the profile asks for it and aiohttp is installed (uses_async_resolver).
+    on_resolved(name, (yt, matched_name)) is called as each name completes.
+    Names found in NAME_CACHE are answered before any SOAP call. Names with
+    the same canonical_name_key share one query per run, even while it is
+    still in flight; each name still picks its own best match.
     """
     out: Dict[str, Tuple[str, str]] = {}
-    cache: Dict[str, Tuple[str, str]] = {}
+    keys = {nm: canonical_name_key(nm) for nm in names}
+    cached = NAME_CACHE.get_many(list(keys.values()))
+    todo: List[str] = []
+    for nm in names:
+        candidates = cached.get(keys[nm])
+        if candidates is None:
+            todo.append(nm)
+            continue
+        out[nm] = pick_best_yt(nm, candidates, speed)
+        if on_resolved is not None:
+            on_resolved(nm, out[nm])
+    if cached:
+        status_cb(f"YTJ SOAP: {len(names) - len(todo)} nimeä välimuistista, {len(todo)} haetaan…")
+    if not todo:
+        return out
+
+    if uses_async_resolver(speed):
+        out.update(resolve_names_async(todo, stop_flag, status_cb, progress_cb, speed, on_resolved))
+    else:
+        out.update(resolve_names_threaded(todo, stop_flag, status_cb, progress_cb, speed, on_resolved))
+    return out
+
+
+def uses_async_resolver(speed: SpeedProfile) -> bool:
+    return speed.name_async and HAS_AIOHTTP
+
+
+def resolve_names_threaded(
+    names: List[str],
+    stop_flag: threading.Event,
+    status_cb,
+    progress_cb,
+    speed: SpeedProfile,
+    on_resolved: Optional[Callable[[str, Tuple[str, str]], None]] = None,
+) -> Dict[str, Tuple[str, str]]:
+    """
+    resolve_names_parallel without aiohttp: one thread per SOAP request in
+    flight, steered by an AIMD controller between name_workers and
+    name_workers_max; same-key lookups coalesce through a SingleFlight.
+    """
+    out: Dict[str, Tuple[str, str]] = {}
+    flights = SingleFlight()
 
     total = max(1, len(names))
     progress_cb(0, total)
 
+    YTJ_SOAP.resize(speed.name_workers_max)
+    queries0, conns0 = YTJ_SOAP.counters()
+
+    ctl = AimdController(
+        start=speed.name_workers,
+        cap=speed.name_workers_max,
+        slow_after=speed.soap_timeout * 0.5,
+    )
+
+    def lookup(nm: str) -> List[Tuple[str, str]]:
+        if not ctl.acquire(stop_flag):
+            return []
+        t0 = time.perf_counter()
+        ok = True
+        try:
+            results = ytj_soap_search_name(nm, speed)
+        except Exception:
+            ok = False
+            results = []
+        finally:
+            ctl.release(ok, time.perf_counter() - t0)
+        if ok:
+            remember_lookup(nm, results)
+        return results
+
     def worker(nm: str):
-        key = nm.strip().lower()
-        if key in cache:
-            return nm, cache[key]
-        yt, matched = resolve_name_to_best_yt(nm, speed)
-        cache[key] = (yt, matched)
-        return nm, (yt, matched)
+        results = flights.do(canonical_name_key(nm), lambda: lookup(nm))
+        return nm, pick_best_yt(nm, results, speed)
 
     done = 0
-    with ThreadPoolExecutor(max_workers=max(1, speed.name_workers)) as ex:
+    with ThreadPoolExecutor(max_workers=max(1, speed.name_workers_max)) as ex:
         futures = [ex.submit(worker, nm) for nm in names]
         for fut in as_completed(futures):
             if stop_flag.is_set():
@@ -854,6 +3178,8 @@ def resolve_names_parallel(
             try:
                 nm, res = fut.result()
                 out[nm] = res
+                if on_resolved is not None:
+                    on_resolved(nm, res)
             except Exception:
                 pass
             done += 1
@@ -861,6 +3187,144 @@ def resolve_names_parallel(
                 status_cb(f"YTJ SOAP: nimihaut {done}/{len(names)}")
             progress_cb(done, total)
 
+    status_cb(f"YTJ SOAP: AIMD {ctl.summary()}, {len(flights)} eri hakua {len(names)} nimelle")
+    queries, conns = YTJ_SOAP.counters()
+    queries, conns = queries - queries0, conns - conns0
+    if queries:
+        status_cb(f"YTJ SOAP: {queries} kyselyä, {conns} uutta yhteyttä, "
+                  f"{max(0, queries - conns)} käytti avointa yhteyttä")
+    if RATE_LIMITER.stats_text():
+        status_cb(f"Nopeusrajoitin: {RATE_LIMITER.stats_text()}")
+    return out
+
+
+def resolve_names_async(
+    names: List[str],
+    stop_flag: threading.Event,
+    status_cb,
+    progress_cb,
+    speed: SpeedProfile,
+    on_resolved: Optional[Callable[[str, Tuple[str, str]], None]] = None,
+) -> Dict[str, Tuple[str, str]]:
+    """
+    resolve_names_parallel on one event loop: name_workers_max worker
+    coroutines take keys from a queue, and lookups in flight are steered by
+    the same AIMD controller (name_workers .. name_workers_max) and connection
+    pool size as resolve_names_threaded, each with a soap_timeout deadline.
+    Everything still pending is cancelled once stop_flag is set. Names with
+    the same canonical_name_key share one lookup.
+    """
+    out: Dict[str, Tuple[str, str]] = {}
+    groups: Dict[str, List[str]] = {}
+    for nm in names:
+        groups.setdefault(canonical_name_key(nm), []).append(nm)
+
+    total = max(1, len(names))
+    progress_cb(0, total)
+    ctl = AimdController(
+        start=speed.name_workers,
+        cap=speed.name_workers_max,
+        slow_after=speed.soap_timeout * 0.5,
+    )
+    done = 0
+    queries = 0
+    conns = 0
+
+    def finish(key: str, results: List[Tuple[str, str]]):
+        nonlocal done
+        for nm in groups[key]:
+            hit = pick_best_yt(nm, results, speed)
+            out[nm] = hit
+            if on_resolved is not None:
+                try:
+                    on_resolved(nm, hit)
+                except Exception:
+                    pass
+            done += 1
+            if done % 5 == 0 or done == len(names):
+                status_cb(f"YTJ SOAP: nimihaut {done}/{len(names)}")
+            progress_cb(done, total)
+
+    async def query(session, nm: str) -> List[Tuple[str, str]]:
+        async with session.get(YTJ_SOAP_HTTPGET, params=soap_search_params(nm)) as r:
+            r.raise_for_status()
+            parser = SoapSearchParser(nm, max(5, speed.soap_max_results))
+            async for chunk in r.content.iter_chunked(SOAP_READ_CHUNK):
+                if not parser.feed(chunk):
+                    break
+            parser.close()
+            return parser.results
+
+    async def lookup(session, freed: asyncio.Condition, key: str):
+        """One SOAP query for `key`; the caller holds an AIMD slot."""
+        nonlocal queries
+        nm = groups[key][0]
+        ok = True
+        t0 = time.perf_counter()
+        try:
+            wait = RATE_LIMITER.reserve(YTJ_SOAP_HTTPGET)
+            if wait > 0:
+                await asyncio.sleep(wait)
+                t0 = time.perf_counter()
+            queries += 1
+            results = await asyncio.wait_for(query(session, nm), timeout=speed.soap_timeout)
+        except asyncio.CancelledError:
+            ctl.abandon()
+            raise
+        except Exception:
+            ok = False
+            results = []
+        ctl.release(ok, time.perf_counter() - t0)
+        async with freed:
+            freed.notify_all()
+        if ok:
+            remember_lookup(nm, results)
+        finish(key, results)
+
+    async def on_connection(session, ctx, params):
+        nonlocal conns
+        conns += 1
+
+    async def worker(session, keys: "asyncio.Queue[str]", freed: asyncio.Condition):
+        while not stop_flag.is_set():
+            try:
+                key = keys.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            async with freed:
+                await freed.wait_for(ctl.try_acquire)
+            await lookup(session, freed, key)
+
+    async def run():
+        freed = asyncio.Condition()
+        keys: "asyncio.Queue[str]" = asyncio.Queue()
+        for key in groups:
+            keys.put_nowait(key)
+        trace = aiohttp.TraceConfig()
+        trace.on_connection_create_end.append(on_connection)
+        # one host: the pool is as large as the AIMD cap, like YTJ_SOAP's
+        connector = aiohttp.TCPConnector(
+            limit=speed.name_workers_max, limit_per_host=speed.name_workers_max, ttl_dns_cache=300
+        )
+        headers = {"Accept-Encoding": "gzip, deflate"}
+        async with aiohttp.ClientSession(connector=connector, headers=headers, trace_configs=[trace]) as session:
+            n = min(len(groups), max(1, speed.name_workers_max))
+            pending = {asyncio.ensure_future(worker(session, keys, freed)) for _ in range(n)}
+            while pending:
+                _, pending = await asyncio.wait(pending, timeout=0.1)
+                if stop_flag.is_set():
+                    for t in pending:
+                        t.cancel()
+                    await asyncio.gather(*pending, return_exceptions=True)
+                    break
+
+    asyncio.run(run())
+    status_cb(f"YTJ SOAP (asyncio): AIMD {ctl.summary()}, {len(groups)} eri hakua {len(names)} nimelle")
+    if queries:
+        status_cb(f"YTJ SOAP: {queries} kyselyä, {conns} uutta yhteyttä, "
+                  f"{max(0, queries - conns)} käytti avointa yhteyttä")
+    if RATE_LIMITER.stats_text():
+        status_cb(f"Nopeusrajoitin: {RATE_LIMITER.stats_text()}")
     return out
 
 
@@ -870,81 +3334,282 @@ def fetch_emails_parallel(
     status_cb,
     progress_cb,
     speed: SpeedProfile,
-    source: str
+    source: str,
+    events: Optional[ResultStream] = None,
+    pool: Optional[DriverPool] = None,
+    feed: Optional[YtFeed] = None,
 ) -> List[Row]:
     """
-    Parallel: yt -> email using Selenium, each worker has its own driver.
+    Parallel: yt -> email. YTs are first tried over plain HTTP
+    (http_workers), then with batched fetch() calls inside one YTJ tab
+    (fetch_fanout); the rest go to Selenium, each worker has its own driver
+    (checked out of `pool`; without a pool, drivers live for this call only)
+    and keeps `tabs_per_worker` YTJ pages in flight in it.
+    The stages are chained by YtFeeds and run concurrently, so a YT moves on
+    as soon as the stage before it is done with it. With `feed`, YTs keep
+    arriving (`yts` are just the first of them) until the producer closes it.
+    Workers pull Y-tunnukset from one shared queue, so a worker stuck on slow
+    pages never holds up work the others could do; a worker starts its
+    browser as soon as there is work for it.
+    Every finished company is emitted to `events` right away; progress and the
+    returned rows are built from that same stream.
     Has run-level cache to avoid repeats.
     """
-    yts = sorted({yt for yt in yts if yt})
-    total = max(1, len(yts))
-    progress_cb(0, total)
+    if feed is None:
+        feed = YtFeed(sorted({yt for yt in yts if yt}))
+        feed.close()
+    else:
+        feed.put(sorted({yt for yt in yts if yt}))
+    progress_cb(0, max(1, feed.total))
 
     cache_email: Dict[str, str] = {}
-    rows: List[Row] = []
     lock = threading.Lock()
 
-    # split work among workers
-    workers = max(1, speed.email_workers)
-    chunks = [[] for _ in range(workers)]
-    for i, yt in enumerate(yts):
-        chunks[i % workers].append(yt)
+    stream = events or ResultStream()
+    collector = RowCollector()
+    stream.subscribe(collector)
 
-    def email_worker(worker_id: int, yt_list: List[str]) -> List[Row]:
-        local_rows: List[Row] = []
-        if not yt_list:
-            return local_rows
+    done = 0
+    pages = 0
+    page_bytes = 0
 
-        drv = start_new_driver(speed)
+    def on_progress(res: EmailResult):
+        nonlocal done, pages, page_bytes
+        with lock:
+            done += 1
+            n = done
+            if res.page_bytes:
+                pages += 1
+                page_bytes += res.page_bytes
+        total = feed.total
+        if n % 5 == 0 or n == total:
+            status_cb(f"YTJ email: {n}/{total}")
+        progress_cb(n, max(1, total))
+
+    stream.subscribe(on_progress)
+
+    def on_done(res: EmailResult):
+        with lock:
+            cache_email[res.yt] = res.email or ""
+        res.source = source
+        stream.emit(res)
+
+    own_pool = pool is None
+    if own_pool:
+        pool = DriverPool()
+        pool.configure(speed)
+
+    YTJ_BREAKERS.reset(on_change=status_cb)
+
+    # HTTP first, then batched fetch() fan-out from one YTJ tab; only what
+    # neither can answer needs a browser page of its own
+    stages: List[Tuple[str, Callable[[YtFeed, Callable[[str], None]], None]]] = []
+
+    creds = ytj_credentials()
+
+    def http_stage(src: YtFeed, on_left: Callable[[str], None]):
+        # a streaming producer may take a while: no session before the first YT
+        while not src.pending() and not stop_flag.is_set():
+            if src.drained():
+                return
+            time.sleep(0.05)
+        refresher = None
+        if speed.http_cookie_handoff:
+            refresher = lambda c: establish_ytj_http_session(pool, speed, c)  # noqa: E731
+        client = YtjHttpClient(speed.http_workers, speed.soap_timeout, creds, session_refresher=refresher)
         try:
-            for yt in yt_list:
-                if stop_flag.is_set():
-                    break
-
-                with lock:
-                    if yt in cache_email:
-                        em = cache_email[yt]
-                        local_rows.append(Row(name="", yt=yt, email=em, source=source, notes="cache"))
-                        continue
+            if refresher is not None:
+                try:
+                    establish_ytj_http_session(pool, speed, client)
+                except Exception as e:
+                    status_cb(f"YTJ HTTP: selainistunnon siirto epäonnistui ({e}), jatketaan ilman…")
+            fetch_emails_http(src, client, speed.http_workers, stop_flag, on_done, on_left)
+        finally:
+            client.close()
 
-                em = fetch_email_by_yt(drv, yt, stop_flag, speed)
+    def fanout_stage(src: YtFeed, on_left: Callable[[str], None]):
+        fetch_emails_fanout(src, pool, speed, stop_flag, on_done, on_left)
 
-                with lock:
-                    cache_email[yt] = em or ""
-                local_rows.append(Row(name="", yt=yt, email=em, source=source, notes=""))
+    # the API needs credentials; the cookie handoff reads company pages without them
+    if speed.http_workers > 0 and (creds is not None or speed.http_cookie_handoff):
+        stages.append(("YTJ HTTP", http_stage))
+    elif speed.http_workers > 0:
+        status_cb(f"YTJ HTTP: ohitettu (aseta {YTJ_CUSTOMER_ENV} ja {YTJ_KEY_ENV} käyttääksesi YTJ-rajapintaa)")
+    if speed.fetch_fanout > 0:
+        stages.append(("YTJ fetch", fanout_stage))
 
-                if speed.ytj_per_company_sleep > 0:
-                    time.sleep(speed.ytj_per_company_sleep)
+    def run_stage(name: str, stage, src: YtFeed, dst: YtFeed):
+        try:
+            stage(src, lambda yt: dst.put([yt]))
+            if not stop_flag.is_set() and src.total:
+                status_cb(f"{name}: {src.total - dst.total} valmiina, {dst.total} eteenpäin")
+        except Exception as e:
+            status_cb(f"{name}: ohitettu ({e})")
+            # whatever it did not get to goes straight on
+            while not stop_flag.is_set():
+                rest = src.take(256, 0.1)
+                if rest is None:
+                    break
+                dst.put(rest)
         finally:
+            dst.close()
+
+    browser_src = feed
+    stage_threads: List[threading.Thread] = []
+    for name, stage in stages:
+        dst = YtFeed()
+        t = threading.Thread(target=run_stage, args=(name, stage, browser_src, dst), daemon=True)
+        t.start()
+        stage_threads.append(t)
+        browser_src = dst
+
+    jobs: "queue.Queue[str]" = queue.Queue()   # requeued / retried YTs
+
+    tabs = max(1, speed.tabs_per_worker)
+    workers = max(1, speed.email_workers_max)
+    # pages in flight adapt between the profile's start value and its cap
+    ctl = AimdController(
+        start=speed.email_workers * tabs,
+        cap=speed.email_workers_max * tabs,
+        slow_after=speed.ytj_page_load_timeout * 0.5,
+    )
+
+    def pending() -> int:
+        return jobs.qsize() + browser_src.pending()
+
+    def drained() -> bool:
+        return jobs.empty() and browser_src.drained()
+
+    def next_job() -> Optional[str]:
+        while not stop_flag.is_set():
             try:
-                drv.quit()
-            except Exception:
-                pass
-
-        return local_rows
+                yt = jobs.get_nowait()
+            except queue.Empty:
+                got = browser_src.take(1)
+                if not got:
+                    return None
+                yt = got[0]
+            with lock:
+                cached = cache_email.get(yt)
+            if cached is None:
+                return yt
+            stream.emit(EmailResult(yt=yt, email=cached, source=source, notes="cache"))
+        return None
+
+    requeues: Dict[str, int] = {}
+
+    def requeue(yt: str):
+        """In-flight YT of a crashed driver goes back to the queue (a few times)."""
+        with lock:
+            n = requeues[yt] = requeues.get(yt, 0) + 1
+        if n > MAX_YT_REQUEUES:
+            on_done(EmailResult(yt=yt, attempts=n, notes="browser crashed repeatedly"))
+        else:
+            jobs.put(yt)
+
+    hooks = WorkerHooks(
+        next_job=next_job, on_done=on_done, requeue=requeue, retry=jobs.put, ctl=ctl, idle=drained
+    )
+
+    active = 0
+
+    def claim_driver() -> bool:
+        """
+        One more browser only while there are more waiting YTs than busy tabs,
+        and only as many browsers as the controller's page limit fills: the
+        profile's email_workers at first (its memory bound), more once AIMD
+        has grown the limit past what the running ones' tabs can hold.
+        """
+        nonlocal active
+        with lock:
+            browsers = max(speed.email_workers, (int(ctl.limit) + tabs - 1) // tabs)
+            if active < browsers and pending() > active * tabs:
+                active += 1
+                return True
+            return False
+
+    def email_worker(worker_id: int):
+        """Supervised: recycles its driver when due and restarts it after a crash."""
+        nonlocal active
+        while not claim_driver():
+            if stop_flag.is_set() or drained():
+                return
+            time.sleep(0.05)
+        try:
+            # the driver starts only once the controller lets one more page fly
+            if not ctl.acquire(stop_flag, drained):
+                return
+            held = 1
+
+            crashes = 0
+            while not stop_flag.is_set():
+                if not held and drained():
+                    return
+                try:
+                    drv = pool.checkout(speed)
+                except Exception as e:
+                    for _ in range(held):
+                        ctl.abandon()
+                    status_cb(f"YTJ email: worker {worker_id + 1} ei saanut selainta ({e})")
+                    return
+                broken = False
+                dry = False
+                try:
+                    if tabs > 1:
+                        dry = run_tabbed_ytj_worker(drv, tabs, hooks, held, stop_flag, speed)
+                    else:
+                        dry = run_single_ytj_worker(drv, hooks, held, stop_flag, speed)
+                    if not dry:
+                        broken = True  # recycle: quit it and start a fresh one
+                        status_cb(f"YTJ email: worker {worker_id + 1} vaihtaa selaimen "
+                                  f"({getattr(drv, 'ytj_pages', 0)} sivua)")
+                except Exception:
+                    broken = True
+                    crashes += 1
+                    status_cb(f"YTJ email: selain kaatui (worker {worker_id + 1}), käynnistetään uudelleen…")
+                    if crashes > MAX_WORKER_RESTARTS:
+                        return
+                finally:
+                    held = 0
+                    pool.checkin(drv, broken=broken)
+                if dry:
+                    return
+        finally:
+            with lock:
+                active -= 1
 
-    done = 0
     with ThreadPoolExecutor(max_workers=workers) as ex:
-        futs = []
-        for w, chunk in enumerate(chunks):
-            futs.append(ex.submit(email_worker, w, chunk))
-
+        futs = [ex.submit(email_worker, w) for w in range(workers)]
         for fut in as_completed(futs):
-            part = []
             try:
-                part = fut.result()
+                fut.result()
             except Exception:
-                part = []
-            rows.extend(part)
-            # update progress approximately
-            done = min(len(cache_email), len(yts))
-            status_cb(f"YTJ email: {done}/{len(yts)}")
-            progress_cb(done, total)
+                pass
+    for t in stage_threads:
+        t.join()
 
-    # ensure order by yt
-    rows.sort(key=lambda r: r.yt)
-    progress_cb(len(yts), total)
-    return rows
+    if browser_src.total:
+        status_cb(f"YTJ email: AIMD sivut {ctl.summary()}")
+    if RATE_LIMITER.stats_text():
+        status_cb(f"Nopeusrajoitin: {RATE_LIMITER.stats_text()}")
+    if YTJ_BREAKERS.trips:
+        status_cb(f"YTJ: esto havaittu {YTJ_BREAKERS.trips} kertaa, haut tauotettiin")
+
+    # anything no stage or worker could take (e.g. Chrome would not start) is a miss, not silence
+    if not stop_flag.is_set():
+        leftover_note = "YTJ kept blocking requests" if YTJ_PAGE_BREAKER.gave_up else "not processed (no browser)"
+        with lock:
+            missing = [yt for yt in feed.all() if yt not in cache_email]
+        for yt in missing:
+            on_done(EmailResult(yt=yt, notes=leftover_note))
+
+    if own_pool:
+        pool.close()
+
+    if pages:
+        status_cb(f"YTJ email: keskimäärin {page_bytes / pages / 1024:.0f} kB/sivu ({pages} sivua)")
+    progress_cb(feed.total, max(1, feed.total))
+    return collector.sorted_rows()
 
 
 # =========================
@@ -991,6 +3656,8 @@ class App(BaseTk):
         super().__init__()
         self.stop_flag = threading.Event()
         self.last_output_dir: Optional[str] = None
+        # warm YTJ worker drivers, kept between PLAY / Paste / PDF runs
+        self.driver_pool = DriverPool()
 
         # theme
         self.BG = "#ffffff"
@@ -1010,6 +3677,26 @@ class App(BaseTk):
         self.configure(bg=self.BG)
 
         self._build_ui()
+        self.driver_pool.configure(self._current_speed())
+        self.speed_var.trace_add("write", lambda *_: self._on_speed_change())
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+        # SOAP handshakes happen while the user is still pasting (threaded resolver only)
+        speed = self._current_speed()
+        YTJ_SOAP.resize(speed.name_workers_max)
+        if not uses_async_resolver(speed):
+            threading.Thread(target=YTJ_SOAP.preconnect, args=(speed.name_workers,), daemon=True).start()
+
+    def _on_speed_change(self):
+        speed = self._current_speed()
+        self.driver_pool.configure(speed)
+        YTJ_SOAP.resize(speed.name_workers_max)
+
+    def _on_close(self):
+        self.stop_flag.set()
+        self.driver_pool.close()
+        NAME_CACHE.close()
+        self.destroy()
 
     def _card(self, parent):
         return tk.Frame(parent, bg=self.CARD, highlightthickness=1, highlightbackground=self.BORDER)
@@ -1052,6 +3739,26 @@ class App(BaseTk):
         self.progress["value"] = v
         self.update_idletasks()
 
+    def _new_result_stream(self) -> ResultStream:
+        """Fresh per-run event stream with the live UI counter subscribed."""
+        self._live_done = 0
+        self._live_found = 0
+        self.live_var.set("")
+        stream = ResultStream()
+        stream.subscribe(self._on_email_result)
+        return stream
+
+    def _on_email_result(self, res: EmailResult):
+        self._live_done += 1
+        if res.email:
+            self._live_found += 1
+        txt = f"Käsitelty {self._live_done} | sähköposteja {self._live_found}"
+        if res.attempts:
+            txt += f" | viimeisin {res.yt}: {res.latency:.1f}s, {res.attempts} lukua"
+        if res.page_bytes:
+            txt += f", {res.page_bytes / 1024:.0f} kB"
+        self.live_var.set(txt)
+
     def request_stop(self):
         self.stop_flag.set()
         self._set_status("Pysäytetään…")
@@ -1102,7 +3809,10 @@ class App(BaseTk):
         self.status = tk.Label(status_card, text="Valmiina.", bg=self.CARD, fg=self.TEXT, font=("Segoe UI", 11))
         self.status.pack(anchor="w", padx=12, pady=(12, 6))
         self.progress = ttk.Progressbar(status_card, orient="horizontal", mode="determinate", length=920)
-        self.progress.pack(fill="x", padx=12, pady=(0, 12))
+        self.progress.pack(fill="x", padx=12, pady=(0, 6))
+        self.live_var = tk.StringVar(value="")
+        tk.Label(status_card, textvariable=self.live_var, bg=self.CARD, fg=self.MUTED,
+                 font=("Segoe UI", 9)).pack(anchor="w", padx=12, pady=(0, 12))
 
         # PROTEST PLAY CARD
         play_card = self._card(root)
@@ -1247,7 +3957,10 @@ class App(BaseTk):
     def _run_protest(self, url: str, port: int, test_limit: int, speed: SpeedProfile):
         try:
             self._set_status(f"PLAY: Aloitetaan protestilista → YTJ ({speed.name}) …")
-            rows, emails = pipeline_protest_attach(url, port, test_limit, self._set_status, self._set_progress, self.stop_flag, speed)
+            rows, emails = pipeline_protest_attach(
+                url, port, test_limit, self._set_status, self._set_progress, self.stop_flag, speed,
+                events=self._new_result_stream(), pool=self.driver_pool,
+            )
 
             if self.stop_flag.is_set():
                 self._set_status("Pysäytetty.")
@@ -1287,7 +4000,8 @@ class App(BaseTk):
 
             rows, emails = pipeline_paste(
                 text, strict, max_names, enable_name_fallback,
-                self._set_status, self._set_progress, self.stop_flag, speed
+                self._set_status, self._set_progress, self.stop_flag, speed,
+                events=self._new_result_stream(), pool=self.driver_pool,
             )
 
             if self.stop_flag.is_set():
@@ -1333,7 +4047,10 @@ class App(BaseTk):
     def _run_pdf(self, pdf_path: str, speed: SpeedProfile):
         try:
             self._set_status(f"PDF: Aloitetaan ajo ({speed.name})…")
-            rows, emails = pipeline_pdf(pdf_path, self._set_status, self._set_progress, self.stop_flag, speed)
+            rows, emails = pipeline_pdf(
+                pdf_path, self._set_status, self._set_progress, self.stop_flag, speed,
+                events=self._new_result_stream(), pool=self.driver_pool,
+            )
 
             if self.stop_flag.is_set():
                 self._set_status("Pysäytetty.")
@@ -138,10 +138,15 @@ def click_show_more_until_end(
     max_passes: int = 600,
     scroll_sleep: float = 0.20,
     post_click_sleep: float = 0.25,
+    throttle: Optional[Callable[[], None]] = None,
+    on_more: Optional[Callable[[], bool]] = None,
 ):
     """
     Scroll + click "Näytä lisää" until it disappears / max passes.
     Guard: if navigation goes away -> return to protest list.
+    throttle (optional) is called before each click; it may block to pace requests.
+    on_more (optional) is called after each click, e.g. to harvest the rows
+    that just appeared; returning False ends the loop.
     """
     from selenium.webdriver.common.keys import Keys
 
@@ -187,6 +192,8 @@ def click_show_more_until_end(
 
         btn = find_show_more()
         if btn:
+            if throttle is not None:
+                throttle()
             try:
                 driver.execute_script("arguments[0].scrollIntoView({block:'center'});", btn)
                 time.sleep(0.02)
@@ -196,6 +203,8 @@ def click_show_more_until_end(
                     driver.execute_script("arguments[0].click();", btn)
                 _status(status_cb, f"KL: Klikattu 'Näytä lisää' ({passes}/{max_passes})")
                 time.sleep(post_click_sleep)
+                if on_more is not None and not on_more():
+                    break
                 continue
             except WebDriverException:
                 time.sleep(0.15)
@@ -219,6 +228,40 @@ def click_show_more_until_end(
     _status(status_cb, "KL: Latauslooppi valmis.")
 
 
+# Watches the list for added nodes; each call returns only the text added
+# since the previous one (the whole body on the first call or after a reload).
+KL_NEW_TEXT_JS = """
+var w = window.__klYtWatch;
+if (!w || !document.body) {
+  if (!document.body) return '';
+  w = window.__klYtWatch = {added: []};
+  new MutationObserver(function (muts) {
+    for (var i = 0; i < muts.length; i++) {
+      var nodes = muts[i].addedNodes;
+      for (var j = 0; j < nodes.length; j++) w.added.push(nodes[j]);
+    }
+  }).observe(document.body, {childList: true, subtree: true});
+  return document.body.innerText || '';
+}
+var out = [];
+for (var k = 0; k < w.added.length; k++) {
+  var n = w.added[k];
+  if (n.isConnected) out.push(n.innerText !== undefined ? n.innerText : (n.textContent || ''));
+}
+w.added = [];
+return out.join('\\n');
+"""
+
+
+def _yts_from_text(txt: str) -> List[str]:
+    yts = set()
+    for m in YT_RE.findall(txt):
+        n = _normalize_yt(m)
+        if n:
+            yts.add(n)
+    return sorted(yts)
+
+
 def extract_ytunnukset_via_js(driver) -> List[str]:
     """
     Extract Y-tunnus from full DOM text (fast).
@@ -230,10 +273,17 @@ def extract_ytunnukset_via_js(driver) -> List[str]:
             txt = driver.find_element(By.TAG_NAME, "body").text or ""
         except Exception:
             txt = ""
+    return _yts_from_text(txt)
 
-    yts = set()
-    for m in YT_RE.findall(txt):
-        n = _normalize_yt(m)
-        if n:
-            yts.add(n)
-    return sorted(yts)
+
+def extract_new_ytunnukset_via_js(driver) -> List[str]:
+    """
+    Y-tunnus from the rows added since the previous call only, so harvesting
+    after every "Näytä lisää" click does not re-read the whole list.
+    Rows changed in place are not seen; finish with extract_ytunnukset_via_js.
+    """
+    try:
+        txt = driver.execute_script(KL_NEW_TEXT_JS) or ""
+    except Exception:
+        return extract_ytunnukset_via_js(driver)
+    return _yts_from_text(txt)
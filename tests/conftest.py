@@ -0,0 +1,98 @@
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+BLOCKED_YT = "1111111-1"   # the stub answers 429 for this one
+BAD_CUSTOMER = "väärä"     # wmYritysTiedot answers 401 for this asiakastunnus
+PAGE_EMAILS = {"1234567-8": "info@virtanen.fi", "7654321-0": ""}   # server-rendered company pages
+
+
+def fixture_bytes(name: str) -> bytes:
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+class StubYtj:
+    """Serves recorded YTJ responses on 127.0.0.1 and keeps the queries it got."""
+
+    def __init__(self):
+        self.queries = []
+        self.require_consent = False
+        self.consented = False
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                q = {k: v[0] for k, v in parse_qs(url.query, keep_blank_values=True).items()}
+                stub.queries.append((url.path, q))
+                status, ctype, body = stub.answer(url.path, q)
+                self.send_response(status)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def answer(self, path: str, q):
+        xml = "text/xml; charset=utf-8"
+        if path.endswith("/wmYritysTiedot"):
+            if q.get("asiakastunnus") == BAD_CUSTOMER:
+                return 401, "text/plain", b"Unauthorized"
+            yt = q.get("ytunnus", "")
+            if yt == BLOCKED_YT:
+                return 429, "text/html; charset=utf-8", fixture_bytes("too_many_requests.html")
+            name = f"wmYritysTiedot_{yt}.xml"
+            if os.path.exists(os.path.join(FIXTURES, name)):
+                return 200, xml, fixture_bytes(name)
+            return 200, xml, b'<?xml version="1.0"?><YritysTiedot xmlns="http://www.ytj.fi/" />'
+        if path.endswith("/wmYritysHaku"):
+            word = q.get("hakusana", "").lower()
+            if "virhe" in word:
+                return 200, xml, fixture_bytes("wmYritysHaku_error.xml")
+            if "virtanen" in word:
+                return 200, xml, fixture_bytes("wmYritysHaku_virtanen.xml")
+            return 200, xml, fixture_bytes("wmYritysHaku_empty.xml")
+        if path.startswith("/yritys/"):
+            return self.company_page(path.rsplit("/", 1)[-1])
+        return 404, "text/plain", b"not found"
+
+    def company_page(self, yt: str):
+        """Server-rendered company page; the consent wall while consent is required and not given."""
+        html = "text/html; charset=utf-8"
+        if self.require_consent and not self.consented:
+            return 200, html, fixture_bytes("consent_wall.html")
+        if yt == BLOCKED_YT:
+            return 429, html, fixture_bytes("too_many_requests.html")
+        email = PAGE_EMAILS.get(yt)
+        if email is None:
+            return 404, html, "<html><body>Ei yritystä</body></html>".encode()
+        contact = f'<a href="mailto:{email}">{email}</a>' if email else ""
+        return 200, html, f"<html><body><h1>Y-tunnus {yt}</h1>{contact}</body></html>".encode()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_ytj():
+    stub = StubYtj()
+    yield stub
+    stub.close()
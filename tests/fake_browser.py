@@ -0,0 +1,163 @@
+"""
+In-process stand-in for the worker Chrome: enough of the WebDriver surface
+for the YTJ email engine, answering the engine's page scripts from a table
+of fake companies instead of a browser.
+"""
+import itertools
+import threading
+
+from selenium.common.exceptions import InvalidSessionIdException
+
+import app
+
+
+class FakeYtj:
+    """
+    The fake site. emails: yt -> address ("" = page without contact info).
+    blocked: yt -> how many more visits get a block page. crash: yt -> how
+    many more visits kill the driver right after navigation.
+    """
+
+    def __init__(self, emails, blocked=None, crash=None):
+        self.emails = dict(emails)
+        self.blocked = dict(blocked or {})
+        self.crash = dict(crash or {})
+        self.visits = []
+        self.drivers = []
+        self._lock = threading.Lock()
+
+    def visit(self, yt: str) -> str:
+        """Page state for one navigation: "contact", "absent", "blocked" or "crash"."""
+        with self._lock:
+            self.visits.append(yt)
+            if self.crash.get(yt):
+                self.crash[yt] -= 1
+                return "crash"
+            if self.blocked.get(yt):
+                self.blocked[yt] -= 1
+                return "blocked"
+        return "contact" if self.emails.get(yt) else "absent"
+
+    def factory(self, speed):
+        drv = FakeDriver(self)
+        drv.ytj_flavor = app.worker_flavor(speed)
+        with self._lock:
+            self.drivers.append(drv)
+        return drv
+
+
+class _SwitchTo:
+    def __init__(self, drv):
+        self._drv = drv
+
+    def window(self, handle):
+        self._drv._check()
+        self._drv.current_window_handle = handle
+
+    def new_window(self, kind="tab"):
+        self._drv._check()
+        h = f"tab-{next(self._drv._ids)}"
+        self._drv.window_handles.append(h)
+        self._drv._tabs[h] = (None, None)
+        self._drv.current_window_handle = h
+        self._drv.most_tabs = max(self._drv.most_tabs, len(self._drv.window_handles))
+
+
+class _Body:
+    text = ""
+
+
+class FakeDriver:
+    def __init__(self, site: FakeYtj):
+        self.site = site
+        self.dead = False
+        self.quit_called = False
+        self.most_tabs = 1
+        self._ids = itertools.count(1)
+        self.window_handles = ["tab-0"]
+        self.current_window_handle = "tab-0"
+        self._tabs = {"tab-0": (None, None)}   # handle -> (yt, state)
+        self.switch_to = _SwitchTo(self)
+
+    def _check(self):
+        if self.dead:
+            raise InvalidSessionIdException("invalid session id")
+
+    def _navigate(self, url: str):
+        self._check()
+        yt = url.rstrip("/").rsplit("/", 1)[-1]
+        state = self.site.visit(yt)
+        if state == "crash":
+            self.dead = True
+            state = None
+        self._tabs[self.current_window_handle] = (yt, state)
+
+    # --- navigation / scripts ---
+    def get(self, url):
+        self._navigate(url)
+
+    def execute_script(self, script, *args):
+        self._check()
+        yt, state = self._tabs[self.current_window_handle]
+        if script == "return 1;":
+            return 1
+        if script.startswith("window.location.href"):
+            self._navigate(args[0])
+            return None
+        if script == app.YTJ_PROBE_JS:
+            if args[0] != yt:
+                return {"state": None, "quiet": 0, "blocked": False}
+            return {"state": "rendered" if state == "absent" else state, "quiet": 10 ** 6,
+                    "blocked": state == "blocked"}
+        if script == app.YTJ_EXTRACT_JS:
+            email = self.site.emails.get(yt) or ""
+            return {
+                "mailto": [f"mailto:{email}"] if email else [],
+                "rows": [],
+                "nayta": 0,
+                "body": f"Y-tunnus {yt}",
+                "bytes": 1000,
+            }
+        return 0
+
+    def execute_async_script(self, script, *args):
+        self._check()
+        _, state = self._tabs[self.current_window_handle]
+        return state or "timeout"
+
+    def execute_cdp_cmd(self, cmd, params):
+        self._check()
+        return {}
+
+    # --- the rest of the surface the engine touches ---
+    def find_elements(self, *args):
+        self._check()
+        return []
+
+    def find_element(self, *args):
+        self._check()
+        return _Body()
+
+    def get_cookies(self):
+        return []
+
+    def set_page_load_timeout(self, t):
+        self._check()
+
+    def set_script_timeout(self, t):
+        self._check()
+
+    @property
+    def current_url(self):
+        yt, _ = self._tabs[self.current_window_handle]
+        return app.YTJ_COMPANY_URL.format(yt) if yt else "about:blank"
+
+    def close(self):
+        self._check()
+        h = self.current_window_handle
+        self.window_handles.remove(h)
+        self._tabs.pop(h, None)
+
+    def quit(self):
+        self.quit_called = True
+        self.dead = True
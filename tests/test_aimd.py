@@ -0,0 +1,36 @@
+import threading
+
+import app
+
+
+def test_aimd_starts_at_start_and_caps_slots():
+    ctl = app.AimdController(start=2, cap=4, slow_after=1.0)
+    assert ctl.try_acquire() and ctl.try_acquire()
+    assert not ctl.try_acquire()
+    ctl.abandon()
+    assert ctl.try_acquire()
+
+
+def test_aimd_grows_on_fast_successes_up_to_cap():
+    ctl = app.AimdController(start=1, cap=3, slow_after=1.0)
+    for _ in range(50):
+        assert ctl.try_acquire()
+        ctl.release(True, 0.01)
+    assert ctl.limit == 3
+
+
+def test_aimd_halves_on_failure_or_slow_response_once_per_cooldown():
+    ctl = app.AimdController(start=8, cap=8, slow_after=1.0, cooldown=60.0)
+    ctl.try_acquire()
+    ctl.release(False, 0.01)
+    assert ctl.limit == 4
+    ctl.try_acquire()
+    ctl.release(True, 5.0)   # slow, but inside the cooldown
+    assert ctl.limit == 4
+    assert ctl.failures == 2 and ctl.cuts == 1
+
+
+def test_aimd_acquire_gives_up_when_idle():
+    ctl = app.AimdController(start=1, cap=1, slow_after=1.0)
+    assert ctl.acquire(threading.Event())
+    assert not ctl.acquire(threading.Event(), idle=lambda: True)
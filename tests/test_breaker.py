@@ -0,0 +1,49 @@
+import threading
+import time
+
+import app
+
+
+def test_breaker_trips_probes_and_closes(monkeypatch):
+    monkeypatch.setattr(app, "BREAKER_BASE_BACKOFF", 0.05)
+    brk = app.CircuitBreaker("a.example")
+    assert brk.try_admit() is False
+    brk.record(True)
+    assert brk.trips == 1 and not brk.closed()
+    assert brk.try_admit() is None          # everyone waits out the back-off
+    time.sleep(0.06)
+    assert brk.try_admit() is True          # one probe
+    assert brk.try_admit() is None
+    brk.record(False, probe=True)
+    assert brk.closed() and brk.try_admit() is False
+
+
+def test_breaker_gives_up_after_failed_probes(monkeypatch):
+    monkeypatch.setattr(app, "BREAKER_BASE_BACKOFF", 0.0)
+    brk = app.CircuitBreaker("a.example")
+    brk.record(True)
+    for _ in range(app.BREAKER_MAX_FAILED_PROBES):
+        assert brk.try_admit() is True
+        brk.record(True, probe=True)
+    assert brk.gave_up
+    assert brk.admit(threading.Event()) is None
+
+
+def test_breakers_are_per_host():
+    breakers = app.HostBreakers()
+    api = breakers.for_url("https://api.tietopalvelu.ytj.fi/x")
+    page = breakers.for_url("https://tietopalvelu.ytj.fi/yritys/1")
+    assert breakers.for_url("https://api.tietopalvelu.ytj.fi/y") is api
+    api.record(True)
+    assert not api.closed() and page.closed()
+    assert breakers.trips == 1
+    breakers.reset()
+    assert api.closed() and breakers.trips == 0
+
+
+def test_only_429_and_challenges_count_as_blocks():
+    assert app.looks_blocked(429, "", "1234567-8")
+    assert not app.looks_blocked(503, "Service Unavailable", "1234567-8")
+    assert not app.looks_blocked(403, "Access denied", "1234567-8")
+    assert app.looks_blocked(200, "<title>Are you a robot?</title>", "1234567-8")
+    assert not app.looks_blocked(200, "captcha settings ... 1234567-8", "1234567-8")
@@ -0,0 +1,77 @@
+import threading
+
+import pytest
+
+import app
+from conftest import BAD_CUSTOMER
+
+
+@pytest.fixture
+def pages(stub_ytj, monkeypatch):
+    monkeypatch.setattr(app, "YTJ_COMPANY_URL", stub_ytj.url + "/yritys/{}")
+    app.RATE_LIMITER.configure({})
+    app.YTJ_BREAKERS.reset()
+    yield stub_ytj
+    app.YTJ_BREAKERS.reset()
+
+
+def handoff_client(stub, credentials=None):
+    refreshes = []
+
+    def refresher(client):
+        refreshes.append(1)
+        stub.consented = True   # the browser accepted the banner
+
+    c = app.YtjHttpClient(
+        2, 5.0, credentials, details_url=stub.url + "/yritystiedot.asmx/wmYritysTiedot",
+        session_refresher=refresher,
+    )
+    c.page_fallback = True   # as after seed_from_driver()
+    return c, refreshes
+
+
+def test_handoff_reads_company_pages_without_credentials(pages):
+    client, refreshes = handoff_client(pages)
+    try:
+        assert client.fetch_email("1234567-8") == "info@virtanen.fi"
+        assert client.fetch_email("7654321-0") is None
+        assert not any(path.endswith("/wmYritysTiedot") for path, _ in pages.queries)
+        assert refreshes == []
+    finally:
+        client.close()
+
+
+def test_consent_wall_refreshes_the_session_once(pages):
+    pages.require_consent = True
+    client, refreshes = handoff_client(pages)
+    try:
+        assert client.fetch_email("1234567-8") == "info@virtanen.fi"
+        assert client.fetch_email("1234567-8") == "info@virtanen.fi"
+        assert refreshes == [1]
+    finally:
+        client.close()
+
+
+def test_refused_api_signature_does_not_refresh_the_session(pages):
+    client, refreshes = handoff_client(pages, app.YtjCredentials(BAD_CUSTOMER, "avain"))
+    try:
+        # the API refuses; the company page still answers
+        assert client.fetch_email("1234567-8") == "info@virtanen.fi"
+        assert refreshes == []
+    finally:
+        client.close()
+
+
+def test_handoff_stage_runs_without_credentials(pages):
+    client, _ = handoff_client(pages)
+    src = app.YtFeed(["1234567-8", "9999999-9"])
+    src.close()
+    results, left = {}, []
+    try:
+        app.fetch_emails_http(
+            src, client, 2, threading.Event(), lambda r: results.__setitem__(r.yt, r.email), left.append
+        )
+    finally:
+        client.close()
+    assert results == {"1234567-8": "info@virtanen.fi"}
+    assert left == ["9999999-9"]
@@ -0,0 +1,303 @@
+import dataclasses
+import os
+import subprocess
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+import app
+import kl_protest_module as klm
+from fake_browser import FakeYtj
+
+ENGINE_TIMEOUT = 15.0
+
+
+def engine_speed(base: str = "Fast", **overrides) -> app.SpeedProfile:
+    """A profile that goes straight to the browser workers, without pauses."""
+    fields = dict(
+        http_workers=0,
+        fetch_fanout=0,
+        tabs_per_worker=1,
+        ytj_per_company_sleep=0.0,
+        ytj_extract_mode="dom",
+        host_rates={},
+    )
+    fields.update(overrides)
+    return dataclasses.replace(app.SPEEDS[base], **fields)
+
+
+@pytest.fixture(autouse=True)
+def quick_breaker(monkeypatch):
+    monkeypatch.setattr(app, "BREAKER_BASE_BACKOFF", 0.05)
+    app.RATE_LIMITER.configure({})
+    app.YTJ_BREAKERS.reset()
+    yield
+    app.YTJ_BREAKERS.reset()
+
+
+def run_engine(site: FakeYtj, speed: app.SpeedProfile, yts, feed=None, events=None):
+    """fetch_emails_parallel on fake drivers; fails instead of hanging."""
+    pool = app.DriverPool(factory=site.factory)
+    pool.configure(speed)
+    stop = threading.Event()
+    out = {}
+
+    def run():
+        out["rows"] = app.fetch_emails_parallel(
+            yts, stop, lambda msg: None, lambda done, total: None, speed, "test",
+            events=events, pool=pool, feed=feed,
+        )
+
+    t = threading.Thread(target=run, daemon=True)
+    t.start()
+    t.join(ENGINE_TIMEOUT)
+    hung = t.is_alive()
+    stop.set()
+    t.join(5)
+    pool.close()
+    assert not hung, "email engine did not finish"
+    return {r.yt: r for r in out["rows"]}
+
+
+def companies(n: int):
+    return {f"{1000000 + i}-{i % 10}": (f"info{i}@yritys{i}.fi" if i % 3 else "") for i in range(n)}
+
+
+@pytest.mark.parametrize("tabs", [1, 3])
+def test_block_page_pauses_and_recovers(tabs):
+    emails = companies(12)
+    first = sorted(emails)[0]
+    site = FakeYtj(emails, blocked={first: 1})
+    rows = run_engine(site, engine_speed(tabs_per_worker=tabs), list(emails))
+    assert {yt: r.email for yt, r in rows.items()} == emails
+    assert site.visits.count(first) == 2
+    assert app.YTJ_BREAKERS.trips == 1
+
+
+@pytest.mark.parametrize("tabs", [1, 3])
+def test_crashed_driver_is_replaced_and_its_yt_requeued(tabs):
+    emails = companies(9)
+    first = sorted(emails)[0]
+    site = FakeYtj(emails, crash={first: 1})
+    rows = run_engine(site, engine_speed(tabs_per_worker=tabs, email_workers=1, email_workers_max=1), list(emails))
+    assert {yt: r.email for yt, r in rows.items()} == emails
+    assert site.visits.count(first) == 2
+    assert len(site.drivers) >= 2 and site.drivers[0].dead
+
+
+def test_yt_that_keeps_crashing_is_written_as_miss():
+    emails = companies(4)
+    first = sorted(emails)[0]
+    site = FakeYtj(emails, crash={first: 10})
+    rows = run_engine(site, engine_speed(email_workers=1, email_workers_max=1), list(emails))
+    assert rows[first].email == ""
+    assert site.visits.count(first) == app.MAX_YT_REQUEUES + 1
+    assert all(rows[yt].email == emails[yt] for yt in emails if yt != first)
+
+
+def test_driver_recycled_after_page_budget():
+    emails = companies(10)
+    site = FakeYtj(emails)
+    rows = run_engine(site, engine_speed(email_workers=1, email_workers_max=1, driver_recycle_pages=4), list(emails))
+    assert {yt: r.email for yt, r in rows.items()} == emails
+    assert len(site.drivers) >= 3
+    assert all(d.quit_called for d in site.drivers[:-1])
+
+
+@pytest.mark.skipif(not app.HAS_PSUTIL, reason="psutil not installed")
+def test_driver_memory_counts_chromedriver_children():
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    try:
+        me = types.SimpleNamespace(service=types.SimpleNamespace(process=types.SimpleNamespace(pid=os.getpid())))
+        assert app.driver_memory_mb(me) > 1
+        assert app.driver_memory_mb(object()) == 0.0
+    finally:
+        child.kill()
+        child.wait()
+
+
+def test_streamed_feed_is_answered_as_it_grows():
+    emails = companies(12)
+    yts = sorted(emails)
+    feed = app.YtFeed(yts[:3])
+
+    def producer():
+        for i in range(3, len(yts), 3):
+            time.sleep(0.05)
+            feed.put(yts[i:i + 3] + yts[:1])   # repeats are dropped
+        feed.close()
+
+    threading.Thread(target=producer, daemon=True).start()
+    site = FakeYtj(emails)
+    rows = run_engine(site, engine_speed(), [], feed=feed)
+    assert {yt: r.email for yt, r in rows.items()} == emails
+    assert sorted(site.visits) == yts
+
+
+class FakeProtestList:
+    """The KL protest list in the attached Chrome: rows appear a page at a time."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.shown = 1
+        self.read = 0   # pages already handed out incrementally
+        self.sent = 0   # rows handed to Python
+        self.quit_called = False
+
+    def more(self) -> bool:
+        self.shown += 1
+        return True
+
+    def execute_script(self, script, *args):
+        if script == klm.KL_NEW_TEXT_JS:
+            text = "\n".join(self.pages[self.read:self.shown])
+            self.sent += sum(len(p.splitlines()) for p in self.pages[self.read:self.shown])
+            self.read = self.shown
+            return text
+        self.sent += sum(len(p.splitlines()) for p in self.pages[:self.shown])
+        return "\n".join(self.pages[:self.shown])
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_protest_harvest_reads_each_row_once(monkeypatch):
+    emails = companies(30)
+    yts = sorted(emails)
+    pages = ["\n".join(f"Yritys {yt} protesti" for yt in yts[i:i + 5]) for i in range(0, len(yts), 5)]
+    kl = FakeProtestList(pages)
+
+    def clicks(driver, stop_flag, on_more=None, **kw):
+        while kl.shown < len(pages) and kl.more() and on_more():
+            pass
+
+    monkeypatch.setattr(app, "start_driver_attach_debug", lambda port, speed: kl)
+    monkeypatch.setattr(klm, "ensure_on_page", lambda driver, url, status_cb=None: None)
+    monkeypatch.setattr(klm, "click_show_more_until_end", clicks)
+    site = FakeYtj(emails)
+    speed = engine_speed()
+    pool = app.DriverPool(factory=site.factory)
+    pool.configure(speed)
+    try:
+        rows, _ = app.pipeline_protest_attach(
+            klm.KL_ALLOWED_PREFIX, 9222, 0, lambda msg: None, lambda done, total: None,
+            threading.Event(), speed, pool=pool,
+        )
+    finally:
+        pool.close()
+    assert {r.yt: r.email for r in rows} == emails
+    assert kl.quit_called
+    # every row once incrementally, plus one full read at the end
+    assert kl.sent == 2 * len(yts)
+
+
+def test_fanout_hands_chrome_back_once_unusable():
+    emails = companies(6)
+    yts = sorted(emails)
+    site = FakeYtj(emails)   # its company pages make no XHRs to replay
+    speed = engine_speed(fetch_fanout=2)
+    pool = app.DriverPool(factory=site.factory)
+    pool.configure(speed)
+    feed = app.YtFeed(yts[:3])
+    left = []
+    t = threading.Thread(
+        target=app.fetch_emails_fanout,
+        args=(feed, pool, speed, threading.Event(), lambda res: None, left.append),
+        daemon=True,
+    )
+    t.start()
+    try:
+        deadline = time.monotonic() + 5
+        while len(left) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.3)
+        drv = pool.checkout(speed)   # while the feed is still open
+        assert drv is site.drivers[0] and len(site.drivers) == 1
+        pool.checkin(drv)
+        feed.put(yts[3:])
+        feed.close()
+        t.join(5)
+        assert not t.is_alive()
+        assert left == yts
+    finally:
+        pool.close()
+
+
+def test_workers_share_one_queue_and_answer_every_yt():
+    emails = companies(40)
+    site = FakeYtj(emails)
+    rows = run_engine(site, engine_speed(email_workers=3, email_workers_max=3), list(emails))
+    assert {yt: r.email for yt, r in rows.items()} == emails
+    assert sorted(site.visits) == sorted(emails)   # no company read twice
+
+
+def test_every_company_is_streamed_once():
+    emails = companies(15)
+    events = app.ResultStream()
+    got = []
+    events.subscribe(lambda res: 1 / 0)   # a broken subscriber does not stop the run
+    events.subscribe(got.append)
+    rows = run_engine(FakeYtj(emails), engine_speed(email_workers=2), list(emails), events=events)
+    assert sorted(res.yt for res in got) == sorted(emails)
+    assert {res.yt: res.email for res in got} == {yt: r.email for yt, r in rows.items()} == emails
+    assert all(res.attempts >= 1 for res in got)
+
+
+def test_tabbed_worker_answers_every_yt_in_one_chrome():
+    emails = companies(20)
+    site = FakeYtj(emails)
+    rows = run_engine(site, engine_speed(email_workers=1, email_workers_max=1, tabs_per_worker=4), list(emails))
+    assert {yt: r.email for yt, r in rows.items()} == emails
+    assert len(site.drivers) == 1 and site.drivers[0].most_tabs == 4
+    assert sorted(site.visits) == sorted(emails)
+
+
+@pytest.mark.parametrize("tabs", [1, 3])
+def test_engine_gives_up_on_a_host_that_stays_blocked(tabs, monkeypatch):
+    monkeypatch.setattr(app, "BREAKER_MAX_FAILED_PROBES", 2)
+    emails = companies(8)
+    site = FakeYtj(emails, blocked={yt: 100 for yt in emails})
+    rows = run_engine(site, engine_speed(email_workers=2, email_workers_max=2, tabs_per_worker=tabs), list(emails))
+    assert set(rows) == set(emails)
+    assert all(r.email == "" for r in rows.values())
+    assert app.YTJ_BREAKERS.for_url(app.YTJ_COMPANY_URL).gave_up
+    # one tripping page per worker tab in flight, then the two probes
+    assert len(site.visits) <= 2 * tabs + 2
+
+
+def test_paste_fetches_emails_while_names_resolve(monkeypatch):
+    hits = {"Virtanen Oy": "1234567-8", "Korhonen Ky": "2345678-9", "Mäkinen Tmi": ""}
+    emails = {"1234567-8": "info@virtanen.fi", "2345678-9": "toimisto@korhonen.fi"}
+    site = FakeYtj(emails)
+
+    def resolve(names, stop_flag, status_cb, progress_cb, speed, on_resolved=None):
+        out = {}
+        for nm in names:
+            out[nm] = (hits[nm], nm if hits[nm] else "")
+            on_resolved(nm, out[nm])
+            if hits[nm]:
+                # the next name waits until this YT's page was read
+                deadline = time.monotonic() + 5
+                while hits[nm] not in site.visits and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                assert hits[nm] in site.visits, "email stage did not start before resolution ended"
+        return out
+
+    monkeypatch.setattr(app, "resolve_names_parallel", resolve)
+    speed = engine_speed()
+    pool = app.DriverPool(factory=site.factory)
+    pool.configure(speed)
+    try:
+        rows, found = app.pipeline_paste(
+            "\n".join(hits), True, 50, True, lambda msg: None, lambda done, total: None,
+            threading.Event(), speed, pool=pool,
+        )
+    finally:
+        pool.close()
+    assert sorted(found) == sorted(emails.values())
+    by_name = {r.name: r for r in rows if r.source == "paste(name)->ytj"}
+    assert by_name["Virtanen Oy"].email == "info@virtanen.fi"
+    assert by_name["Mäkinen Tmi"].yt == ""
@@ -0,0 +1,71 @@
+import hashlib
+import threading
+
+import pytest
+
+import app
+from conftest import BLOCKED_YT
+
+
+@pytest.fixture
+def client(stub_ytj):
+    creds = app.YtjCredentials("asiakas", "salainen")
+    c = app.YtjHttpClient(2, 5.0, creds, details_url=stub_ytj.url + "/yritystiedot.asmx/wmYritysTiedot")
+    yield c
+    c.close()
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers():
+    app.YTJ_BREAKERS.reset()
+    yield
+    app.YTJ_BREAKERS.reset()
+
+
+def test_email_from_recorded_details(client):
+    assert client.fetch_email("1234567-8") == "info@virtanen.fi"
+
+
+def test_contact_block_without_email_is_empty(client):
+    assert client.fetch_email("7654321-0") == ""
+
+
+def test_unknown_company_cannot_answer(client):
+    assert client.fetch_email("9999999-9") is None
+
+
+def test_requests_are_signed(client, stub_ytj):
+    client.fetch_email("1234567-8")
+    _, q = stub_ytj.queries[-1]
+    assert q["asiakastunnus"] == "asiakas"
+    assert len(q["aikaleima"]) == 16
+    expected = hashlib.sha1(("asiakas" + "salainen" + q["aikaleima"]).encode()).hexdigest().upper()
+    assert q["tarkiste"] == expected
+    assert all("salainen" not in v for v in q.values())
+
+
+def test_throttled_response_raises_blocked(client):
+    with pytest.raises(app.YtjBlocked) as e:
+        client.fetch_email(BLOCKED_YT)
+    assert e.value.host == "127.0.0.1"
+
+
+def test_http_stage_answers_and_passes_on(client):
+    src = app.YtFeed(["1234567-8", "7654321-0", "9999999-9"])
+    src.close()
+    results, left = {}, []
+    app.fetch_emails_http(
+        src, client, 2, threading.Event(), lambda r: results.__setitem__(r.yt, r.email), left.append
+    )
+    assert results == {"1234567-8": "info@virtanen.fi", "7654321-0": ""}
+    assert left == ["9999999-9"]
+
+
+def test_credentials_come_from_environment(monkeypatch):
+    monkeypatch.delenv(app.YTJ_CUSTOMER_ENV, raising=False)
+    monkeypatch.delenv(app.YTJ_KEY_ENV, raising=False)
+    assert app.ytj_credentials() is None
+    monkeypatch.setenv(app.YTJ_CUSTOMER_ENV, "asiakas")
+    assert app.ytj_credentials() is None
+    monkeypatch.setenv(app.YTJ_KEY_ENV, "salainen")
+    assert app.ytj_credentials() == app.YtjCredentials("asiakas", "salainen")
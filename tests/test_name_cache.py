@@ -0,0 +1,58 @@
+import os
+import threading
+import time
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = app.NameCache(os.path.join(str(tmp_path), "names.sqlite3"), ttl_days=1.0, miss_ttl_days=0.5)
+    yield c
+    c.close()
+
+
+def test_name_cache_round_trip_and_rescoring(cache):
+    candidates = [("1234567-8", "Virtanen Oy"), ("2345678-9", "Virtanen Ky")]
+    cache.put("virtanen oy", candidates)
+    got = cache.get_many(["virtanen oy", "unknown"])
+    assert got == {"virtanen oy": candidates}
+    speed = app.SPEEDS["Normal"]
+    # every asking name picks its own match from the stored candidates
+    assert app.pick_best_yt("Virtanen Oy", got["virtanen oy"], speed)[0] == "1234567-8"
+    assert app.pick_best_yt("Virtanen Ky", got["virtanen oy"], speed)[0] == "2345678-9"
+
+
+def test_name_cache_expires_hits_and_misses_separately(cache, monkeypatch):
+    cache.put("hit", [("1234567-8", "Virtanen Oy")])
+    cache.put("miss", [])
+    now = time.time()
+    monkeypatch.setattr(app.time, "time", lambda: now + 0.75 * 86400)
+    assert set(cache.get_many(["hit", "miss"])) == {"hit"}
+    monkeypatch.setattr(app.time, "time", lambda: now + 1.5 * 86400)
+    assert cache.get_many(["hit", "miss"]) == {}
+
+
+def test_name_cache_bulk_lookup_and_threads(cache):
+    keys = [f"yritys {i}" for i in range(app.NAME_CACHE_BULK + 50)]
+
+    def writer(part):
+        for k in part:
+            cache.put(k, [("1234567-8", k)])
+
+    threads = [threading.Thread(target=writer, args=(keys[i::4],)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    got = cache.get_many(keys)
+    assert len(got) == len(keys)
+    assert got["yritys 3"] == [("1234567-8", "yritys 3")]
+
+
+def test_name_cache_fails_soft(tmp_path):
+    c = app.NameCache(os.path.join(str(tmp_path), "missing-dir", "names.sqlite3"))
+    c.put("k", [])
+    assert c.get_many(["k"]) == {}
@@ -0,0 +1,55 @@
+import threading
+import time
+
+import app
+
+
+def test_canonical_name_key_normalizes_spelling():
+    assert app.canonical_name_key("VIRTANEN OY") == "virtanen oy"
+    assert app.canonical_name_key("Virtanen, Oy.") == "virtanen oy"
+    assert app.canonical_name_key("Virtanen Osakeyhtiö") == "virtanen oy"
+    assert app.canonical_name_key("  Ｖirtanen   Oy ") == "virtanen oy"   # NFKC
+
+
+def test_canonical_name_key_keeps_the_legal_form():
+    assert app.canonical_name_key("Virtanen Oy") != app.canonical_name_key("Virtanen Ky")
+    assert app.canonical_name_key("Oy") == "oy"
+
+
+def test_single_flight_runs_once_per_key():
+    flights = app.SingleFlight()
+    calls = []
+    gate = threading.Event()
+
+    def slow():
+        calls.append(1)
+        gate.wait(2)
+        return ["result"]
+
+    out = []
+    threads = [threading.Thread(target=lambda: out.append(flights.do("k", slow))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert calls == [1]
+    assert out == [["result"]] * 5
+    assert flights.do("k", lambda: ["other"]) == ["result"]
+    assert len(flights) == 1
+
+
+def test_single_flight_shares_errors():
+    flights = app.SingleFlight()
+
+    def boom():
+        raise ValueError("down")
+
+    for _ in range(2):
+        try:
+            flights.do("k", boom)
+        except ValueError as e:
+            assert str(e) == "down"
+        else:
+            raise AssertionError("error was not shared")
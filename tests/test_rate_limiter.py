@@ -0,0 +1,21 @@
+import app
+
+
+def test_rate_limiter_spaces_requests_per_host():
+    rl = app.HostRateLimiter()
+    rl.configure({"a.example": 2.0})
+    assert rl.interval("https://a.example/x") == 0.5
+    assert rl.interval("https://b.example/x") == 0.0
+    waits = [rl.reserve("https://a.example/x") for _ in range(4)]
+    assert waits[0] == 0.0 and waits[1] == 0.0   # burst of `rate` tokens
+    assert 0.4 < waits[2] <= 0.5
+    assert 0.9 < waits[3] <= 1.0
+    assert rl.reserve("https://b.example/x") == 0.0
+    assert "a.example: 4" in rl.stats_text()
+
+
+def test_rate_limiter_reserves_batches():
+    rl = app.HostRateLimiter()
+    rl.configure({"a.example": 10.0})
+    assert rl.reserve("https://a.example/", n=20) == 0.0
+    assert 0.9 < rl.reserve("https://a.example/") <= 1.1
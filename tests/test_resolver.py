@@ -0,0 +1,43 @@
+import dataclasses
+import threading
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def soap_stub(stub_ytj, monkeypatch):
+    monkeypatch.setattr(app, "YTJ_SOAP_HTTPGET", stub_ytj.url + "/yritystiedot.asmx/wmYritysHaku")
+    monkeypatch.setattr(app, "remember_lookup", lambda name, results: None)
+    app.RATE_LIMITER.configure({})
+    return stub_ytj
+
+
+pytestmark = pytest.mark.skipif(not app.HAS_AIOHTTP, reason="aiohttp not installed")
+
+
+def test_async_resolver_answers_every_name(soap_stub):
+    speed = dataclasses.replace(app.SPEEDS["Turbo"], name_async=True)
+    names = [f"Virtanen {i} Oy" for i in range(200)] + ["Virtanen Ky", "VIRTANEN KY", "Ei Ketään Oy"]
+    seen = []
+    out = app.resolve_names_async(
+        names, threading.Event(), lambda msg: None, lambda done, total: None, speed,
+        on_resolved=lambda nm, hit: seen.append(nm),
+    )
+    assert set(out) == set(names) == set(seen)
+    assert out["VIRTANEN KY"] == ("2345678-9", "Virtanen Ky")
+    assert out["Ei Ketään Oy"] == ("", "")
+    # "Virtanen Ky" and "VIRTANEN KY" share one query
+    assert len(soap_stub.queries) == len(names) - 1
+
+
+def test_async_resolver_stops_when_asked(soap_stub):
+    speed = dataclasses.replace(app.SPEEDS["Safe"], name_async=True)
+    stop = threading.Event()
+    stop.set()
+    out = app.resolve_names_async(
+        [f"Virtanen {i} Oy" for i in range(500)], stop, lambda msg: None, lambda done, total: None, speed
+    )
+    assert out == {}
+    assert soap_stub.queries == []
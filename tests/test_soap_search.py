@@ -0,0 +1,63 @@
+import pytest
+
+import app
+from conftest import fixture_bytes
+
+
+def feed_in_chunks(parser, data: bytes, size: int = 7):
+    for i in range(0, len(data), size):
+        if not parser.feed(data[i:i + size]):
+            return False
+    return True
+
+
+def test_soap_parser_collects_all_candidates():
+    parser = app.SoapSearchParser("Virtanen", 25)
+    feed_in_chunks(parser, fixture_bytes("wmYritysHaku_virtanen.xml"))
+    parser.close()
+    assert [yt for yt, _ in parser.results] == ["2345678-9", "1234567-8", "3456789-0"]
+
+
+def test_soap_parser_stops_on_near_perfect_match():
+    parser = app.SoapSearchParser("Virtanen Oy", 25)
+    feed_in_chunks(parser, fixture_bytes("wmYritysHaku_virtanen.xml"))
+    parser.close()   # stopped early: not validated further
+    assert parser.done
+    assert parser.results[-1] == ("1234567-8", "Virtanen Oy")
+    assert len(parser.results) == 2
+
+
+def test_soap_parser_stops_at_limit():
+    parser = app.SoapSearchParser("Jotain Muuta", 1)
+    feed_in_chunks(parser, fixture_bytes("wmYritysHaku_virtanen.xml"))
+    assert parser.done and len(parser.results) == 1
+
+
+def test_soap_parser_empty_document_is_a_miss():
+    parser = app.SoapSearchParser("Ei Ketään", 25)
+    feed_in_chunks(parser, fixture_bytes("wmYritysHaku_empty.xml"))
+    parser.close()
+    assert parser.results == []
+
+
+@pytest.mark.parametrize("body", [
+    fixture_bytes("wmYritysHaku_error.xml"),
+    fixture_bytes("too_many_requests.html"),
+    fixture_bytes("wmYritysHaku_virtanen.xml")[:120],
+])
+def test_soap_parser_rejects_incomplete_or_error_documents(body):
+    parser = app.SoapSearchParser("Jotain Muuta", 25)
+    with pytest.raises(app.SoapSearchError):
+        feed_in_chunks(parser, body)
+        parser.close()
+
+
+def test_soap_search_against_stub(stub_ytj, monkeypatch):
+    monkeypatch.setattr(app, "YTJ_SOAP_HTTPGET", stub_ytj.url + "/yritystiedot.asmx/wmYritysHaku")
+    speed = app.SPEEDS["Normal"]
+    results = app.ytj_soap_search_name("Virtanen Ky", speed)
+    assert ("2345678-9", "Virtanen Ky") in results
+    assert app.pick_best_yt("Virtanen Ky", results, speed) == ("2345678-9", "Virtanen Ky")
+    assert app.ytj_soap_search_name("Ei Ketään Oy", speed) == []
+    with pytest.raises(app.SoapSearchError):
+        app.ytj_soap_search_name("Virhe Oy", speed)